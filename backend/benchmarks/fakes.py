@@ -0,0 +1,389 @@
+"""Offline stand-ins for the Claude, Tavily and Supabase clients used by ``main``.
+
+Each fake replays a recorded response from ``recordings/`` and sleeps for a latency drawn
+from a lognormal distribution described by its median and p95, so a benchmark exercises
+the same blocking / threading behaviour as the real SDKs without network access or keys.
+"""
+
+import asyncio
+import copy
+import json
+import math
+import operator
+import os
+import random
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+# z-score of the 95th percentile of a standard normal distribution.
+_Z95 = 1.6449
+
+
+def load_recording(name: str) -> Dict[str, Any]:
+    with open(os.path.join(RECORDINGS_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class LatencyModel:
+    """Lognormal latency with the given median and p95 (seconds), scaled by ``time_scale``."""
+
+    def __init__(self, median_s: float, p95_s: float, rng: random.Random, time_scale: float = 1.0):
+        self.median_s = max(0.0, median_s)
+        self.sigma = math.log(p95_s / median_s) / _Z95 if median_s > 0 and p95_s > median_s else 0.0
+        self.rng = rng
+        self.time_scale = time_scale
+
+    def sample(self) -> float:
+        if self.median_s <= 0 or self.time_scale <= 0:
+            return 0.0
+        return self.median_s * math.exp(self.sigma * self.rng.gauss(0.0, 1.0)) * self.time_scale
+
+
+def parse_latency_override(spec: str) -> Tuple[str, float, float]:
+    """Parse ``name=median:p95`` (seconds) from the command line, e.g. ``supabase=0.03:0.12``."""
+    try:
+        name, values = spec.split("=", 1)
+        median_s, p95_s = (float(v) for v in values.split(":", 1))
+    except ValueError:
+        raise ValueError(f"latency override must look like name=median:p95, got {spec!r}")
+    return name.strip(), median_s, p95_s
+
+
+# =============================================================================
+# CLAUDE
+# =============================================================================
+class FakeClaude:
+    """Replays ``recordings/claude.json``; the entry is chosen by a substring of the system prompt.
+
+    Per-entry latency is used unless ``overrides["claude"]`` (or ``overrides["claude.<site>"]``)
+    is set. The recorded latencies are for the standard model; ``model_latency_factor`` scales
+    them for models whose name contains a key (e.g. the fast tier). Usage is approximated at
+    four characters per token, like ``main._approx_tokens``.
+    """
+
+    def __init__(self, rng: random.Random, time_scale: float = 1.0, overrides: Optional[Dict[str, Tuple[float, float]]] = None):
+        recording = load_recording("claude.json")
+        overrides = overrides or {}
+        self._entries: List[Tuple[str, str, LatencyModel]] = []
+        for entry in recording["responses"]:
+            median_s, p95_s = overrides.get(f"claude.{entry['site']}") or overrides.get("claude") or (entry["median_s"], entry["p95_s"])
+            self._entries.append((entry["match"], entry["text"], LatencyModel(median_s, p95_s, rng, time_scale)))
+        default = recording["default"]
+        median_s, p95_s = overrides.get("claude") or (default["median_s"], default["p95_s"])
+        self._default = (default["text"], LatencyModel(median_s, p95_s, rng, time_scale))
+        self._model_factors: Dict[str, float] = recording.get("model_latency_factor", {})
+        self.calls = 0
+        self.messages = SimpleNamespace(create=self._create)
+
+    def _create(self, *, model: str, max_tokens: int, messages: List[Dict[str, Any]], system: str = "", **_: Any) -> Any:
+        text, latency = self._default
+        for match, recorded, entry_latency in self._entries:
+            if match in system:
+                text, latency = recorded, entry_latency
+                break
+        factor = next((f for key, f in self._model_factors.items() if key in model), 1.0)
+        time.sleep(latency.sample() * factor)
+        self.calls += 1
+        prompt_chars = len(system) + sum(len(str(m.get("content", ""))) for m in messages)
+        return SimpleNamespace(
+            id=f"msg_bench_{self.calls}",
+            model=model,
+            role="assistant",
+            stop_reason="end_turn",
+            content=[SimpleNamespace(type="text", text=text)],
+            usage=SimpleNamespace(input_tokens=prompt_chars // 4, output_tokens=min(max_tokens, len(text) // 4)),
+        )
+
+
+# =============================================================================
+# TAVILY
+# =============================================================================
+class FakeTavily:
+    """Replays ``recordings/tavily.json``. Searches return a query-dependent slice of the pool."""
+
+    def __init__(self, rng: random.Random, time_scale: float = 1.0, overrides: Optional[Dict[str, Tuple[float, float]]] = None):
+        recording = load_recording("tavily.json")
+        overrides = overrides or {}
+        self._pool: List[Dict[str, Any]] = recording["search_results"]
+        self._articles: Dict[str, Dict[str, Any]] = recording["extract"]
+        self._latency = {
+            op: LatencyModel(*(overrides.get(f"tavily.{op}") or overrides.get("tavily") or (lat["median_s"], lat["p95_s"])), rng, time_scale)
+            for op, lat in recording["latency"].items()
+        }
+
+    def search(self, query: str, max_results: int = 5, **_: Any) -> Dict[str, Any]:
+        time.sleep(self._latency["search"].sample())
+        start = zlib.crc32(query.encode("utf-8")) % len(self._pool)
+        picked = [self._pool[(start + i) % len(self._pool)] for i in range(min(max_results, len(self._pool)))]
+        # Callers annotate results in place (quality_score, published_date); hand out copies.
+        return {"query": query, "results": copy.deepcopy(picked)}
+
+    def extract(self, urls: List[str], **_: Any) -> Dict[str, Any]:
+        time.sleep(self._latency["extract"].sample())
+        results, failed = [], []
+        for url in urls:
+            article = self._articles.get(url)
+            if article:
+                results.append({"url": url, **article})
+            else:
+                failed.append({"url": url, "error": "not recorded"})
+        return {"results": results, "failed_results": failed}
+
+
+# =============================================================================
+# SUPABASE (in-memory PostgREST subset)
+# =============================================================================
+def _same(a: Any, b: Any) -> bool:
+    return a == b or (a is not None and b is not None and str(a) == str(b))
+
+
+def _ordered(a: Any, b: Any) -> Tuple[Any, Any]:
+    """Make two filter operands comparable the way Postgres would (numbers as numbers, else text)."""
+    try:
+        return float(a), float(b)
+    except (TypeError, ValueError):
+        return str(a), str(b)
+
+
+def _range_test(test: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    return lambda a, b: a is not None and test(*_ordered(a, b))
+
+
+_COMPARATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": _same,
+    "neq": lambda a, b: not _same(a, b),
+    "lt": _range_test(operator.lt),
+    "lte": _range_test(operator.le),
+    "gt": _range_test(operator.gt),
+    "gte": _range_test(operator.ge),
+    "is": lambda a, b: (a is None) if str(b).lower() == "null" else _same(a, b),
+}
+
+
+def _split_top_level(expr: str) -> List[str]:
+    parts, depth, quoted, buf = [], 0, False, []
+    for ch in expr:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append("".join(buf))
+            buf = []
+        else:
+            buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _parse_logic_filter(expr: str) -> Callable[[Dict[str, Any]], bool]:
+    """Compile a PostgREST ``or=(...)`` body such as ``created_at.lt."t",and(created_at.eq."t",id.lt.5)``."""
+    terms = []
+    for part in _split_top_level(expr):
+        if part.startswith(("and(", "or(")) and part.endswith(")"):
+            inner = _split_top_level(part[part.index("(") + 1 : -1])
+            preds = [_parse_logic_filter(p) for p in inner]
+            combine = all if part.startswith("and(") else any
+            terms.append(lambda row, preds=preds, combine=combine: combine(p(row) for p in preds))
+            continue
+        column, op, value = part.split(".", 2)
+        value = value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+        compare = _COMPARATORS[op]
+        terms.append(lambda row, column=column, compare=compare, value=value: compare(row.get(column), value))
+    return lambda row: any(t(row) for t in terms)
+
+
+def _project(row: Dict[str, Any], columns: str) -> Dict[str, Any]:
+    if columns.strip() == "*":
+        return copy.deepcopy(row)
+    out: Dict[str, Any] = {}
+    for spec in (c.strip() for c in columns.split(",")):
+        if not spec:
+            continue
+        alias, _, expr = spec.rpartition(":")
+        if "->" in expr:
+            column, key = expr.replace("->>", "->").split("->", 1)
+            value = (row.get(column) or {}).get(key)
+            out[alias or key] = copy.deepcopy(value)
+        else:
+            out[alias or expr] = copy.deepcopy(row.get(expr))
+    return out
+
+
+class _FakeQuery:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self._db = db
+        self._table = table
+        self._op = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._payload: Any = None
+        self._filters: List[Callable[[Dict[str, Any]], bool]] = []
+        self._orders: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._conflict = "id"
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "_FakeQuery":
+        self._columns, self._count = columns, count
+        return self
+
+    def insert(self, rows: Any) -> "_FakeQuery":
+        self._op, self._payload = "insert", rows
+        return self
+
+    def update(self, values: Dict[str, Any]) -> "_FakeQuery":
+        self._op, self._payload = "update", values
+        return self
+
+    def upsert(self, values: Dict[str, Any], on_conflict: str = "id") -> "_FakeQuery":
+        self._op, self._payload, self._conflict = "upsert", values, on_conflict
+        return self
+
+    def delete(self) -> "_FakeQuery":
+        self._op = "delete"
+        return self
+
+    def _where(self, column: str, op: str, value: Any) -> "_FakeQuery":
+        compare = _COMPARATORS[op]
+        self._filters.append(lambda row: compare(row.get(column), value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "_FakeQuery":
+        return self._where(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "_FakeQuery":
+        return self._where(column, "neq", value)
+
+    def lt(self, column: str, value: Any) -> "_FakeQuery":
+        return self._where(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "_FakeQuery":
+        return self._where(column, "lte", value)
+
+    def gt(self, column: str, value: Any) -> "_FakeQuery":
+        return self._where(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "_FakeQuery":
+        return self._where(column, "gte", value)
+
+    def in_(self, column: str, values: List[Any]) -> "_FakeQuery":
+        self._filters.append(lambda row: any(_same(row.get(column), v) for v in values))
+        return self
+
+    def or_(self, filters: str) -> "_FakeQuery":
+        self._filters.append(_parse_logic_filter(filters))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "_FakeQuery":
+        self._orders.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "_FakeQuery":
+        self._limit = size
+        return self
+
+    def execute(self) -> Any:
+        time.sleep(self._db.latency.sample())
+        return self._db._run(self)
+
+
+class FakeSupabase:
+    """Thread-safe in-memory tables behind the subset of the supabase-py query builder ``main`` uses.
+
+    Inserted rows get an integer ``id`` and an ISO ``created_at`` when missing; rows round-trip
+    through JSON so callers see the same types the REST API would return.
+    """
+
+    def __init__(self, rng: random.Random, time_scale: float = 1.0, overrides: Optional[Dict[str, Tuple[float, float]]] = None):
+        median_s, p95_s = (overrides or {}).get("supabase") or (0.035, 0.12)
+        self.latency = LatencyModel(median_s, p95_s, rng, time_scale)
+        self._tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self._next_id: Dict[str, int] = defaultdict(lambda: 1)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> _FakeQuery:
+        return _FakeQuery(self, name)
+
+    def seed(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._insert_row(table, row) for row in rows]
+
+    def _insert_row(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        stored = json.loads(json.dumps(row, default=str))
+        if "id" not in stored and table != "profiles":
+            stored["id"] = self._next_id[table]
+            self._next_id[table] += 1
+        stored.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        self._tables[table].append(stored)
+        return copy.deepcopy(stored)
+
+    def _run(self, q: _FakeQuery) -> Any:
+        with self._lock:
+            rows = self._tables[q._table]
+            if q._op == "insert":
+                payload = q._payload if isinstance(q._payload, list) else [q._payload]
+                return SimpleNamespace(data=[self._insert_row(q._table, r) for r in payload], count=None)
+
+            if q._op == "upsert":
+                values = json.loads(json.dumps(q._payload, default=str))
+                existing = [r for r in rows if _same(r.get(q._conflict), values.get(q._conflict))]
+                if not existing:
+                    return SimpleNamespace(data=[self._insert_row(q._table, values)], count=None)
+                existing[0].update(values)
+                return SimpleNamespace(data=copy.deepcopy(existing[:1]), count=None)
+
+            matched = [r for r in rows if all(f(r) for f in q._filters)]
+            if q._op == "update":
+                values = json.loads(json.dumps(q._payload, default=str))
+                for r in matched:
+                    r.update(values)
+                return SimpleNamespace(data=copy.deepcopy(matched), count=None)
+            if q._op == "delete":
+                ids = {id(r) for r in matched}
+                self._tables[q._table] = [r for r in rows if id(r) not in ids]
+                return SimpleNamespace(data=copy.deepcopy(matched), count=None)
+
+            for column, desc in reversed(q._orders):
+                matched.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+            count = len(matched) if q._count else None
+            if q._limit is not None:
+                matched = matched[: q._limit]
+            return SimpleNamespace(data=[_project(r, q._columns) for r in matched], count=count)
+
+
+# =============================================================================
+# CITATION PAGES (httpx transport)
+# =============================================================================
+def citation_page_transport(rng: random.Random, time_scale: float = 1.0, overrides: Optional[Dict[str, Tuple[float, float]]] = None) -> httpx.MockTransport:
+    """An async ``httpx`` transport serving ``recordings/pages.json`` as HTML with citation meta tags."""
+    recording = load_recording("pages.json")
+    lat = recording["latency"]
+    latency = LatencyModel(*((overrides or {}).get("http") or (lat["median_s"], lat["p95_s"])), rng, time_scale)
+    pages = {p["url"]: p for p in recording["pages"]}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency.sample())
+        page = pages.get(str(request.url))
+        if not page:
+            return httpx.Response(404, text="Not Found", request=request)
+        meta = [f'<meta property="og:title" content="{page["title"]}">']
+        if page.get("author"):
+            meta.append(f'<meta name="author" content="{page["author"]}">')
+        if page.get("published"):
+            meta.append(f'<meta property="article:published_time" content="{page["published"]}">')
+        html = f"<html><head><title>{page['title']}</title>{''.join(meta)}</head><body><p>{page['title']}</p></body></html>"
+        return httpx.Response(200, html=html, request=request)
+
+    return httpx.MockTransport(handler)
@@ -0,0 +1,217 @@
+"""Run a load scenario against the app with recorded stand-ins for Claude, Tavily and Supabase.
+
+    cd backend
+    python -m benchmarks.run --scenario research --workers 1,2 --concurrency 8 --requests 32
+
+Each worker is a separate process with its own copy of the app, like a gunicorn
+UvicornWorker; total concurrency and requests are split evenly across workers, which all
+start together. Requests go through ``httpx.ASGITransport`` so no port is opened.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+import traceback
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from .fakes import FakeClaude, FakeSupabase, FakeTavily, citation_page_transport, parse_latency_override
+from .scenarios import SCENARIOS, seed_users
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_SUPABASE_URL = "https://bench.supabase.local"
+BENCH_JWT_SECRET = "bench-jwt-secret-not-for-production"
+
+
+def _load_app(args: argparse.Namespace, worker_index: int) -> Any:
+    """Import ``main`` with no real credentials, then swap in the fakes.
+
+    Empty API keys also stop ``load_dotenv`` from pulling real ones out of ``backend/.env``.
+    ``main.initialize_clients`` is replaced so the startup hook reinstalls the fakes.
+    """
+    os.environ.update({
+        "ANTHROPIC_API_KEY": "",
+        "TAVILY_API_KEY": "",
+        "SUPABASE_SERVICE_KEY": "",
+        "SUPABASE_URL": BENCH_SUPABASE_URL,
+        "SUPABASE_JWT_SECRET": BENCH_JWT_SECRET,
+    })
+    os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    for name in ("deepresearch", "httpx"):
+        logging.getLogger(name).setLevel(args.log_level)
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import main
+
+    rng = random.Random(args.seed * 1000 + worker_index)
+    overrides = {name: (median_s, p95_s) for name, median_s, p95_s in map(parse_latency_override, args.latency)}
+    claude = FakeClaude(rng, args.time_scale, overrides)
+    tavily = FakeTavily(rng, args.time_scale, overrides)
+    db = FakeSupabase(rng, args.time_scale, overrides)
+    pages = citation_page_transport(rng, args.time_scale, overrides)
+
+    def install_fakes() -> None:
+        main.claude_client, main.tavily_client, main.supabase = claude, tavily, db
+
+    install_fakes()
+    main.initialize_clients = install_fakes
+    main.limiter.enabled = False
+
+    # Citation fetches build their own AsyncClient; route those (and only those) to the recorded pages.
+    real_async_client = httpx.AsyncClient
+
+    class ReplayAsyncClient(real_async_client):
+        def __init__(self, *a: Any, **kw: Any):
+            kw.setdefault("transport", pages)
+            super().__init__(*a, **kw)
+
+    httpx.AsyncClient = ReplayAsyncClient
+
+    logging.getLogger().setLevel(args.log_level)
+    return main
+
+
+def _share(total: int, workers: int, index: int) -> int:
+    return total // workers + (1 if index < total % workers else 0)
+
+
+async def _drive(app: Any, users: List[Any], args: argparse.Namespace, clients: int, requests: int, rng: random.Random) -> List[Tuple[str, int, float]]:
+    scenario = SCENARIOS[args.scenario]
+    samples: List[Tuple[str, int, float]] = []
+    remaining = iter(range(requests))
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        for _ in remaining:
+            user = rng.choice(users)
+            started = time.perf_counter()
+            try:
+                label, response = await scenario(client, user, rng)
+                status = response.status_code
+            except Exception as e:
+                label, status = args.scenario, 599
+                logging.getLogger("benchmarks").warning("request failed: %r", e)
+            samples.append((label, status, time.perf_counter() - started))
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+    return samples
+
+
+def _worker(args: argparse.Namespace, index: int, workers: int, barrier: Any, results: Any) -> None:
+    try:
+        main = _load_app(args, index)
+        users = seed_users(main.supabase, args.users, BENCH_SUPABASE_URL, BENCH_JWT_SECRET)
+        clients = _share(args.concurrency, workers, index)
+        requests = _share(args.requests, workers, index)
+        rng = random.Random(args.seed * 7919 + index)
+        barrier.wait()
+        started = time.time()
+        samples = asyncio.run(_drive(main.app, users, args, clients, requests, rng)) if clients and requests else []
+        results.put({"worker": index, "started": started, "finished": time.time(), "samples": samples})
+    except BaseException:
+        # Release the other workers from the start barrier and let the parent report the failure.
+        barrier.abort()
+        results.put({"worker": index, "error": traceback.format_exc()})
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summarize(workers: int, reports: List[Dict[str, Any]]) -> Dict[str, Any]:
+    samples = [s for r in reports for s in r["samples"]]
+    wall_s = max(r["finished"] for r in reports) - min(r["started"] for r in reports)
+    by_label: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for label, status, latency in samples:
+        by_label[label].append((status, latency))
+    endpoints = {}
+    for label, rows in sorted(by_label.items()):
+        latencies = sorted(lat for status, lat in rows if status < 500)
+        endpoints[label] = {
+            "requests": len(rows),
+            "errors": sum(1 for status, _ in rows if status >= 500),
+            "p50_s": _percentile(latencies, 50),
+            "p95_s": _percentile(latencies, 95),
+            "p99_s": _percentile(latencies, 99),
+        }
+    ok = sum(1 for _, status, _ in samples if status < 500)
+    return {
+        "workers": workers,
+        "requests": len(samples),
+        "errors": len(samples) - ok,
+        "wall_s": wall_s,
+        "throughput_rps": ok / wall_s if wall_s > 0 else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def _print_summary(args: argparse.Namespace, summary: Dict[str, Any]) -> None:
+    print(
+        f"\nscenario={args.scenario} workers={summary['workers']} concurrency={args.concurrency} "
+        f"requests={summary['requests']} errors={summary['errors']} wall={summary['wall_s']:.2f}s "
+        f"throughput={summary['throughput_rps']:.2f} req/s"
+    )
+    print(f"  {'endpoint':<34} {'n':>5} {'err':>4} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8}")
+    for label, ep in summary["endpoints"].items():
+        print(f"  {label:<34} {ep['requests']:>5} {ep['errors']:>4} {ep['p50_s']:>8.3f} {ep['p95_s']:>8.3f} {ep['p99_s']:>8.3f}")
+
+
+def run_configuration(args: argparse.Namespace, workers: int) -> Dict[str, Any]:
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(args, i, workers, barrier, results)) for i in range(workers)]
+    for p in procs:
+        p.start()
+    reports = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    failed = [r for r in reports if "error" in r]
+    if failed:
+        raise SystemExit(f"benchmark worker {failed[0]['worker']} failed:\n{failed[0]['error']}")
+    return _summarize(workers, reports)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="research")
+    parser.add_argument("--workers", default="1", help="comma-separated worker counts to compare, e.g. 1,2,4")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients, split across workers")
+    parser.add_argument("--requests", type=int, default=32, help="total requests, split across workers")
+    parser.add_argument("--users", type=int, default=20, help="seeded users per worker")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiply every recorded latency (e.g. 0.1 for a quick run)")
+    parser.add_argument("--latency", action="append", default=[], metavar="NAME=MEDIAN:P95",
+                        help="override a latency distribution: claude, claude.<site>, tavily, tavily.search, tavily.extract, supabase, http")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    summaries = []
+    for workers in (int(w) for w in args.workers.split(",") if w.strip()):
+        summary = run_configuration(args, workers)
+        _print_summary(args, summary)
+        summaries.append(summary)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"scenario": args.scenario, "args": vars(args), "results": summaries}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
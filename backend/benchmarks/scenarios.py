@@ -0,0 +1,136 @@
+"""Load scenarios: seeded users/data and the request each simulated client sends."""
+
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import httpx
+import jwt
+
+from .fakes import FakeSupabase, load_recording
+
+RESEARCH_PROMPTS = [
+    "How effective are urban trees at reducing the heat island effect?",
+    "Do cool roofs lower summer energy use in dense cities?",
+    "What is the evidence linking urban greening to heat-related mortality?",
+    "How are the benefits of urban tree canopy distributed across income groups?",
+    "What funding models sustain municipal urban forestry programmes?",
+]
+
+
+@dataclass
+class BenchUser:
+    uid: str
+    token: str
+    folder_ids: List[int] = field(default_factory=list)
+    conversation_ids: List[int] = field(default_factory=list)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+def mint_access_token(uid: str, supabase_url: str, jwt_secret: str) -> str:
+    """An HS256 access token accepted by ``main._user_from_access_token_local``."""
+    now = int(time.time())
+    claims = {
+        "sub": uid,
+        "email": f"{uid}@bench.local",
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iss": f"{supabase_url}/auth/v1",
+        "iat": now,
+        "exp": now + 6 * 3600,
+    }
+    return jwt.encode(claims, jwt_secret, algorithm="HS256")
+
+
+def seed_users(db: FakeSupabase, count: int, supabase_url: str, jwt_secret: str) -> List[BenchUser]:
+    """Admin profiles (no beta quota), two folders and six report threads of four messages each."""
+    report = next(r["text"] for r in load_recording("claude.json")["responses"] if r["site"] == "generate_report_from_facts")
+    users = []
+    for n in range(count):
+        uid = f"00000000-0000-4000-8000-{n:012d}"
+        user = BenchUser(uid=uid, token=mint_access_token(uid, supabase_url, jwt_secret))
+        db.seed("profiles", [{"id": uid, "role": "admin", "first_name": f"Bench{n}", "reports_quota_locked": False}])
+        user.folder_ids = [f["id"] for f in db.seed("folders", [
+            {"user_id": uid, "name": "Thesis", "color": "#3B82F6"},
+            {"user_id": uid, "name": "Reading list", "color": "#10B981"},
+        ])]
+        for c in range(6):
+            convo = db.seed("conversations", [{
+                "user_id": uid,
+                "title": RESEARCH_PROMPTS[c % len(RESEARCH_PROMPTS)][:60],
+                "folder_id": user.folder_ids[c % 2] if c < 4 else None,
+                "conversation_type": "research_report",
+            }])[0]
+            user.conversation_ids.append(convo["id"])
+            for turn in range(2):
+                db.seed("messages", [
+                    {"conversation_id": convo["id"], "role": "user", "content": RESEARCH_PROMPTS[(c + turn) % len(RESEARCH_PROMPTS)]},
+                    {"conversation_id": convo["id"], "role": "assistant", "model_name": "DeepResearch Report", "content": report,
+                     "metadata": {"report_type": "research_report", "sources_used": 8, "facts_extracted": 6,
+                                  "followup_suggestions": ["What are the maintenance costs?"] * 5}},
+                ])
+        users.append(user)
+    return users
+
+
+# A scenario sends one request for a user and returns (label, response); the label groups the stats.
+Scenario = Callable[[httpx.AsyncClient, BenchUser, random.Random], Awaitable[Tuple[str, httpx.Response]]]
+
+
+async def research(client: httpx.AsyncClient, user: BenchUser, rng: random.Random) -> Tuple[str, httpx.Response]:
+    return "POST /research", await client.post("/research", json={"prompt": rng.choice(RESEARCH_PROMPTS)}, headers=user.headers)
+
+
+def research_mode(mode: str) -> Scenario:
+    async def scenario(client: httpx.AsyncClient, user: BenchUser, rng: random.Random) -> Tuple[str, httpx.Response]:
+        body = {"prompt": rng.choice(RESEARCH_PROMPTS), "mode": mode}
+        return f"POST /research ({mode})", await client.post("/research", json=body, headers=user.headers)
+    return scenario
+
+
+async def mixed_reads(client: httpx.AsyncClient, user: BenchUser, rng: random.Random) -> Tuple[str, httpx.Response]:
+    """Sidebar + thread traffic: mostly reads, with the occasional folder write that invalidates them."""
+    roll = rng.random()
+    if roll < 0.45:
+        cid = rng.choice(user.conversation_ids)
+        return "GET /messages/{id}", await client.get(f"/messages/{cid}", headers=user.headers)
+    if roll < 0.60:
+        cid = rng.choice(user.conversation_ids)
+        return "GET /messages/{id}?light", await client.get(f"/messages/{cid}", params={"limit": 20, "fields": "light"}, headers=user.headers)
+    if roll < 0.80:
+        return "GET /folders", await client.get("/folders", headers=user.headers)
+    if roll < 0.95:
+        return "GET /conversations", await client.get("/conversations", params={"limit": 50}, headers=user.headers)
+    return "POST /folders", await client.post("/folders", json={"name": f"Bench {rng.randint(0, 9999)}"}, headers=user.headers)
+
+
+_PAGE_URLS = [p["url"] for p in load_recording("pages.json")["pages"]]
+
+
+async def citation_burst(client: httpx.AsyncClient, user: BenchUser, rng: random.Random) -> Tuple[str, httpx.Response]:
+    """An export-time burst: ten recorded pages plus one that 404s and falls back to the hostname."""
+    urls = rng.sample(_PAGE_URLS, k=min(10, len(_PAGE_URLS))) + ["https://www.example.org/missing-page"]
+    return "POST /citation-metadata", await client.post("/citation-metadata", json={"urls": urls}, headers=user.headers)
+
+
+_ARTICLE_URLS = list(load_recording("tavily.json")["extract"])
+
+
+async def compare(client: httpx.AsyncClient, user: BenchUser, rng: random.Random) -> Tuple[str, httpx.Response]:
+    mode = "map_reduce" if rng.random() < 0.25 else "standard"
+    body = {"article1_url": _ARTICLE_URLS[0], "article2_url": _ARTICLE_URLS[1], "comparison_mode": mode}
+    return f"POST /compare-articles ({mode})", await client.post("/compare-articles", json=body, headers=user.headers)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "research": research,
+    "research-quick": research_mode("quick"),
+    "research-deep": research_mode("deep"),
+    "mixed": mixed_reads,
+    "citations": citation_burst,
+    "compare": compare,
+}
@@ -1,5 +1,6 @@
 # Gunicorn configuration for production
 import os
+import shutil
 
 # Server socket
 bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
@@ -28,4 +29,15 @@ proc_name = 'deepresearch-backend'
 
 # Server mechanics
 preload_app = True
-tmp_upload_dir = None
\ No newline at end of file
+tmp_upload_dir = None
+
+# Prometheus multiprocess metrics: workers write samples here and /metrics aggregates them.
+# Must be set (and emptied) before the app is preloaded, i.e. at config load time.
+prometheus_multiproc_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/deepresearch-prometheus")
+shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
\ No newline at end of file
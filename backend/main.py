@@ -1,29 +1,47 @@
 import os
 import re
+import random
 import json
+import math
 import time
+import zlib
 import base64
+import heapq
+import hashlib
+import hmac
 import logging
 import asyncio
 import ipaddress
+import sys
+import threading
+import traceback
+import weakref
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
 from urllib.parse import urlparse
 from types import SimpleNamespace
-from typing import Annotated, Any, Dict, List, Optional, Tuple
+from typing import Annotated, Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
 
 import httpx
 import jwt
 from bs4 import BeautifulSoup
 
 from fastapi import FastAPI, HTTPException, Header, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 import anthropic
 from dotenv import load_dotenv
 from supabase import create_client
 from tavily import TavilyClient
+from tavily.errors import TimeoutError as TavilyTimeoutError
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+import prometheus_client as prom
+from prometheus_client import multiprocess as prom_multiprocess
 
 load_dotenv()
 
@@ -34,6 +52,22 @@ logging.basicConfig(
 logger = logging.getLogger("deepresearch")
 
 
+def _env_float(name: str, default: float, minimum: float = 0.0) -> float:
+    """Read a numeric env var, falling back to ``default`` (with a warning) when unparsable."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return max(minimum, float(raw))
+    except ValueError:
+        logger.warning("Invalid %s=%r, using %s", name, raw, default)
+        return default
+
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    return int(_env_float(name, float(default), float(minimum)))
+
+
 def _user_from_access_token_local(access_token: str) -> Optional[SimpleNamespace]:
     """Validate access JWT with the project's JWT secret (no GoTrue round-trip).
 
@@ -93,6 +127,316 @@ def _jwt_role_from_supabase_key(key: str) -> Optional[str]:
     return str(role) if role is not None else None
 
 
+# =============================================================================
+# PROMETHEUS METRICS (multiprocess-safe under gunicorn; served at /metrics)
+# =============================================================================
+# Under gunicorn, gunicorn.conf.py sets PROMETHEUS_MULTIPROC_DIR before the app is imported so
+# every worker writes its samples there and /metrics aggregates them across workers.
+_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)
+
+HTTP_REQUEST_SECONDS = prom.Histogram(
+    "deepresearch_http_request_duration_seconds", "HTTP request latency by route template.",
+    ["method", "route", "status"], buckets=_LATENCY_BUCKETS,
+)
+LLM_CALL_SECONDS = prom.Histogram(
+    "deepresearch_llm_call_duration_seconds", "Claude call latency by call site.",
+    ["site", "model", "outcome"], buckets=_LATENCY_BUCKETS,
+)
+LLM_TOKENS = prom.Counter(
+    "deepresearch_llm_tokens", "Claude tokens by call site and direction (input/output).",
+    ["site", "direction"],
+)
+LLM_QUEUE_DEPTH = prom.Gauge(
+    "deepresearch_llm_queue_depth", "Claude calls waiting in the LLM scheduler, by priority class.",
+    ["priority"], multiprocess_mode="livesum",
+)
+LLM_QUEUE_WAIT_SECONDS = prom.Histogram(
+    "deepresearch_llm_queue_wait_seconds", "Time a Claude call waited for a scheduler slot.",
+    ["priority"], buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 60, 120),
+)
+LLM_HEDGES = prom.Counter(
+    "deepresearch_llm_hedges", "Hedged (duplicate) Claude calls started for slow helper calls.", ["site"],
+)
+SOURCE_EVAL_SKIPPED = prom.Counter(
+    "deepresearch_source_eval_skipped", "Source evaluations decided by the local sufficiency score instead of Claude.",
+    ["decision"],
+)
+LLM_RATE_LIMITED = prom.Counter(
+    "deepresearch_llm_rate_limited", "Claude responses with 429/529 that paused the scheduler.",
+    ["site", "status"],
+)
+TAVILY_CALL_SECONDS = prom.Histogram(
+    "deepresearch_tavily_call_duration_seconds", "Tavily call latency by operation.",
+    ["operation"], buckets=_LATENCY_BUCKETS,
+)
+TAVILY_ERRORS = prom.Counter(
+    "deepresearch_tavily_errors", "Failed Tavily calls by operation.", ["operation"],
+)
+SUPABASE_QUERY_SECONDS = prom.Histogram(
+    "deepresearch_supabase_query_duration_seconds", "Supabase PostgREST request latency by table and method.",
+    ["table", "method"], buckets=_LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = prom.Counter(
+    "deepresearch_cache_requests", "Cache lookups by cache and result (hit/miss).", ["cache", "result"],
+)
+PIPELINE_STAGE_SECONDS = prom.Histogram(
+    "deepresearch_pipeline_stage_duration_seconds", "Pipeline stage wall time (see stage()).",
+    ["stage"], buckets=_LATENCY_BUCKETS,
+)
+RESEARCH_IN_FLIGHT = prom.Gauge(
+    "deepresearch_research_in_flight", "Research runs currently executing.", multiprocess_mode="livesum",
+)
+REPORT_REUSED = prom.Counter(
+    "deepresearch_report_reused", "Research runs that reused a recent run for a near-duplicate prompt.", ["mode"],
+)
+RESEARCH_COALESCED = prom.Counter(
+    "deepresearch_research_coalesced", "Research runs that reused an identical in-flight pipeline run.",
+)
+EVENT_LOOP_LAG_SECONDS = prom.Histogram(
+    "deepresearch_event_loop_lag_seconds", "Delay between a scheduled event-loop wakeup and when it ran.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+    if hit:
+        record_cache_hit()
+
+
+def _metrics_registry() -> Any:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = prom.CollectorRegistry()
+        prom_multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prom.REGISTRY
+
+
+def _instrument_supabase_client(client: Any) -> None:
+    """Time every PostgREST request through httpx event hooks on the client's session."""
+    try:
+        session = client.postgrest.session
+    except Exception as e:
+        logger.warning("Supabase query metrics disabled: %s", e)
+        return
+
+    def on_request(request: httpx.Request) -> None:
+        request.extensions["deepresearch_started"] = time.monotonic()
+
+    def on_response(response: httpx.Response) -> None:
+        started = response.request.extensions.get("deepresearch_started")
+        if started is None:
+            return
+        table = response.request.url.path.rstrip("/").rsplit("/", 1)[-1] or "unknown"
+        SUPABASE_QUERY_SECONDS.labels(table=table, method=response.request.method).observe(time.monotonic() - started)
+
+    session.event_hooks["request"].append(on_request)
+    session.event_hooks["response"].append(on_response)
+
+
+async def _monitor_event_loop_lag(interval_s: float = 0.5) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval_s
+        await asyncio.sleep(interval_s)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - scheduled))
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording request latency by route template (not raw path)."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.monotonic()
+        status = {"code": 500}
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"),
+                status=str(status["code"]),
+            ).observe(time.monotonic() - started)
+
+
+# =============================================================================
+# EVENT LOOP DIAGNOSTICS (opt-in via LOOP_DIAGNOSTICS=1, meant for staging)
+# =============================================================================
+# A heartbeat task ticks every LOOP_BLOCK_THRESHOLD_MS / 4. When it stops ticking, a watchdog
+# thread grabs the loop thread's stack and the route of the task that is running, and the
+# heartbeat logs the whole stall once the loop resumes. Tasks are tagged with their request
+# through a task factory, so work spawned with gather()/create_task() keeps its route.
+# Requests sent with ``X-Loop-Profile: <LOOP_PROFILE_TOKEN>`` are also sample-profiled.
+_request_tags: "weakref.WeakKeyDictionary[asyncio.Task, SimpleNamespace]" = weakref.WeakKeyDictionary()
+_loop_profile_lock = threading.Lock()
+
+
+def _loop_diagnostics_enabled() -> bool:
+    return (os.getenv("LOOP_DIAGNOSTICS") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _tagging_task_factory(loop: asyncio.AbstractEventLoop, coro: Any, **kwargs: Any) -> asyncio.Task:
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    parent = asyncio.current_task(loop)
+    tag = _request_tags.get(parent) if parent is not None else None
+    if tag is not None:
+        _request_tags[task] = tag
+    return task
+
+
+def _running_request_tag(loop: asyncio.AbstractEventLoop) -> Tuple[Optional[asyncio.Task], Optional[SimpleNamespace]]:
+    """Task currently running on ``loop`` and its request tag; safe to call from another thread."""
+    try:
+        task = asyncio.current_task(loop)
+        return task, (_request_tags.get(task) if task is not None else None)
+    except Exception:
+        return None, None
+
+
+def _collapsed_stack(frame: Any, limit: int = 64) -> str:
+    """``file:function`` frames root-first joined by ``;`` (flame graph "folded" format)."""
+    names = []
+    while frame is not None and len(names) < limit:
+        names.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _LoopWatchdog:
+    def __init__(self, loop: asyncio.AbstractEventLoop, threshold_s: float):
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.threshold_s = threshold_s
+        self.interval_s = threshold_s / 4
+        self.last_beat = time.monotonic()
+        self.captured: Optional[Tuple[str, str]] = None
+        self._stop = threading.Event()
+
+    def start(self) -> "_LoopWatchdog":
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+        self.heartbeat_task = self.loop.create_task(self._heartbeat())
+        logger.info("Loop diagnostics enabled (block threshold %.0f ms)", self.threshold_s * 1000)
+        return self
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self.last_beat = time.monotonic()
+            await asyncio.sleep(self.interval_s)
+            stalled = time.monotonic() - self.last_beat - self.interval_s
+            if stalled >= self.threshold_s:
+                route, stack = self.captured or ("unknown", "  <stall ended before the watchdog sampled it>\n")
+                logger.warning(
+                    "Event loop blocked for %.0f ms (route=%s). Loop thread stack while blocked:\n%s",
+                    stalled * 1000, route, stack,
+                )
+            self.captured = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            if self.captured is not None or time.monotonic() - self.last_beat < self.threshold_s + self.interval_s:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            _, tag = _running_request_tag(self.loop)
+            self.captured = (tag.route if tag else "background", "".join(traceback.format_stack(frame, limit=40)))
+
+
+class _LoopSampler:
+    """Samples the loop thread's stack while one request is in flight (attributed via its tag)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, tag: SimpleNamespace, interval_s: float):
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.tag = tag
+        self.interval_s = interval_s
+        self.counts: Counter = Counter()
+        self.started = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loop-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            task, tag = _running_request_tag(self.loop)
+            if task is None or frame is None:
+                self.counts["<loop idle or in a worker thread>"] += 1
+            elif tag is not self.tag:
+                self.counts["<other tasks>"] += 1
+            else:
+                self.counts[_collapsed_stack(frame)] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        total = sum(self.counts.values())
+        elapsed_ms = (time.monotonic() - self.started) * 1000
+        # Innermost frames first; the full stacks go to LOOP_PROFILE_DIR when set.
+        top = "\n".join(
+            f"  {n:>6}  {' <- '.join(reversed(stack.split(';')[-6:]))}" for stack, n in self.counts.most_common(20)
+        )
+        logger.warning(
+            "Loop profile for %s: %d samples over %.0f ms (every %.0f ms)\n%s",
+            self.tag.route, total, elapsed_ms, self.interval_s * 1000, top,
+        )
+        out_dir = os.getenv("LOOP_PROFILE_DIR")
+        if out_dir:
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", self.tag.route).strip("_")
+            path = os.path.join(out_dir, f"{int(time.time() * 1000)}-{slug}.folded")
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.writelines(f"{stack} {n}\n" for stack, n in self.counts.items())
+            except OSError as e:
+                logger.warning("Could not write loop profile to %s: %s", path, e)
+
+
+class LoopDiagnosticsMiddleware:
+    """Tags each request's task with its route; profiles it when ``X-Loop-Profile`` matches the token."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        task = asyncio.current_task()
+        if scope["type"] != "http" or task is None:
+            await self.app(scope, receive, send)
+            return
+        tag = SimpleNamespace(route=f"{scope.get('method', '')} {scope.get('path', '')}")
+        _request_tags[task] = tag
+
+        sampler = None
+        token = (os.getenv("LOOP_PROFILE_TOKEN") or "").strip()
+        requested = dict(scope.get("headers") or []).get(b"x-loop-profile", b"").decode("latin-1")
+        if token and requested and hmac.compare_digest(requested, token):
+            if _loop_profile_lock.acquire(blocking=False):
+                interval_s = _env_float("LOOP_PROFILE_INTERVAL_MS", 5.0, 1.0) / 1000
+                sampler = _LoopSampler(asyncio.get_running_loop(), tag, interval_s)
+            else:
+                logger.info("Loop profile already running; %s not profiled", tag.route)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_tags.pop(task, None)
+            if sampler is not None:
+                try:
+                    sampler.stop()
+                finally:
+                    _loop_profile_lock.release()
+
+
 # --- Initialize Clients ---
 claude_client = None
 tavily_client = None
@@ -113,7 +457,7 @@ def initialize_clients():
     supabase_service_key = (os.getenv("SUPABASE_SERVICE_KEY") or "").strip() or None
 
     if anthropic_api_key:
-        claude_client = anthropic.Anthropic(api_key=anthropic_api_key)
+        claude_client = anthropic.Anthropic(api_key=anthropic_api_key, max_retries=0)
         logger.info("Claude client initialized")
     else:
         logger.warning("ANTHROPIC_API_KEY not found")
@@ -140,6 +484,7 @@ def initialize_clients():
                 "Could not decode SUPABASE_SERVICE_KEY as a Supabase JWT; verify the full key was copied."
             )
         supabase = create_client(supabase_url, supabase_service_key)
+        _instrument_supabase_client(supabase)
         logger.info("Supabase client initialized (role=%s)", role)
 
     jwt_secret = (os.getenv("SUPABASE_JWT_SECRET") or "").strip()
@@ -172,6 +517,13 @@ def _resolved_cors_allowed_origins() -> List[str]:
 @app.on_event("startup")
 async def startup_event():
     initialize_clients()
+    asyncio.get_running_loop().set_default_executor(_blocking_io_executor())
+    app.state.loop_lag_monitor = asyncio.create_task(_monitor_event_loop_lag())
+    if _loop_diagnostics_enabled():
+        loop = asyncio.get_running_loop()
+        loop.set_task_factory(_tagging_task_factory)
+        threshold_s = _env_float("LOOP_BLOCK_THRESHOLD_MS", 100.0, 10.0) / 1000
+        app.state.loop_watchdog = _LoopWatchdog(loop, threshold_s).start()
 
 
 allowed_origins = _resolved_cors_allowed_origins()
@@ -194,7 +546,11 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Changes-Until"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+if _loop_diagnostics_enabled():
+    app.add_middleware(LoopDiagnosticsMiddleware)
 
 # --- Pydantic Models ---
 class ResearchRequest(BaseModel):
@@ -202,6 +558,8 @@ class ResearchRequest(BaseModel):
     conversation_id: Optional[int] = None
     folder_id: Optional[int] = None
     force_process: Optional[bool] = False
+    # "quick", "standard" (default) or "deep"; see RESEARCH_MODES
+    mode: Optional[str] = None
 
 class FolderCreate(BaseModel):
     name: str
@@ -231,6 +589,8 @@ class ArticleComparisonRequest(BaseModel):
     comparison_focus: Optional[str] = None
     context: Optional[str] = None
     folder_id: Optional[int] = None
+    # "standard" (single call over selected excerpts) or "map_reduce" (per-section claims, then synthesis)
+    comparison_mode: Optional[str] = None
 
 
 class ComparisonFollowupRequest(BaseModel):
@@ -311,27 +671,812 @@ def _auth_uid(user: Any) -> str:
     return str(user.id)
 
 
+# =============================================================================
+# PIPELINE INSTRUMENTATION (per-stage spans, token accounting, metrics registry)
+# =============================================================================
+stage_logger = logging.getLogger("deepresearch.stages")
+
+
+class StageSpan:
+    """One timed pipeline stage. LLM token usage inside the stage is added by ``call_claude``."""
+
+    __slots__ = ("name", "attrs", "wall_ms", "input_tokens", "output_tokens", "llm_calls", "cache_hits", "error")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.name = name
+        self.attrs = attrs
+        self.wall_ms = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.llm_calls = 0
+        self.cache_hits = 0
+        self.error: Optional[str] = None
+
+
+class PipelineTrace:
+    """Collects the spans of one request (e.g. one ``/research`` run) for its usage event."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.monotonic()
+        self.spans: List[StageSpan] = []
+        self.attrs: Dict[str, Any] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for s in self.spans:
+            agg = stages.setdefault(
+                s.name,
+                {"count": 0, "wall_ms": 0.0, "max_ms": 0.0, "input_tokens": 0, "output_tokens": 0, "llm_calls": 0, "cache_hits": 0, "errors": 0},
+            )
+            agg["count"] += 1
+            agg["wall_ms"] = round(agg["wall_ms"] + s.wall_ms, 1)
+            agg["max_ms"] = round(max(agg["max_ms"], s.wall_ms), 1)
+            agg["input_tokens"] += s.input_tokens
+            agg["output_tokens"] += s.output_tokens
+            agg["llm_calls"] += s.llm_calls
+            agg["cache_hits"] += s.cache_hits
+            agg["errors"] += 1 if s.error else 0
+        return {
+            "total_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "input_tokens": sum(s.input_tokens for s in self.spans),
+            "output_tokens": sum(s.output_tokens for s in self.spans),
+            "stages": stages,
+            **self.attrs,
+        }
+
+
+class StageMetricsRegistry:
+    """Process-wide aggregates per stage name: counts, latency histogram and token totals."""
+
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 40000, 60000)
+
+    def __init__(self):
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, span: StageSpan) -> None:
+        agg = self._stages.get(span.name)
+        if agg is None:
+            agg = self._stages[span.name] = {
+                "count": 0, "errors": 0, "wall_ms_sum": 0.0, "wall_ms_max": 0.0,
+                "input_tokens": 0, "output_tokens": 0, "llm_calls": 0, "cache_hits": 0,
+                "buckets": [0] * (len(self.BUCKETS_MS) + 1),
+            }
+        agg["count"] += 1
+        agg["errors"] += 1 if span.error else 0
+        agg["wall_ms_sum"] += span.wall_ms
+        agg["wall_ms_max"] = max(agg["wall_ms_max"], span.wall_ms)
+        agg["input_tokens"] += span.input_tokens
+        agg["output_tokens"] += span.output_tokens
+        agg["llm_calls"] += span.llm_calls
+        agg["cache_hits"] += span.cache_hits
+        for i, bound in enumerate(self.BUCKETS_MS):
+            if span.wall_ms <= bound:
+                agg["buckets"][i] += 1
+                break
+        else:
+            agg["buckets"][-1] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: {**agg, "buckets": list(agg["buckets"])} for name, agg in self._stages.items()}
+
+
+stage_metrics = StageMetricsRegistry()
+_current_trace: contextvars.ContextVar[Optional[PipelineTrace]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[StageSpan]] = contextvars.ContextVar("current_span", default=None)
+
+
+@contextmanager
+def stage(name: str, **attrs: Any) -> Iterator[StageSpan]:
+    """Time a pipeline stage; spans attach to the current ``PipelineTrace`` (if any), the
+    process metrics registry and one ``deepresearch.stages`` log line."""
+    span = StageSpan(name, attrs)
+    token = _current_span.set(span)
+    started = time.monotonic()
+    try:
+        yield span
+    except BaseException as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        span.wall_ms = (time.monotonic() - started) * 1000
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(span)
+        stage_metrics.observe(span)
+        PIPELINE_STAGE_SECONDS.labels(stage=name).observe(span.wall_ms / 1000)
+        stage_logger.info(
+            "stage=%s wall_ms=%.1f in_tok=%d out_tok=%d llm_calls=%d cache_hits=%d%s%s",
+            name, span.wall_ms, span.input_tokens, span.output_tokens, span.llm_calls, span.cache_hits,
+            f" error={span.error}" if span.error else "",
+            "".join(f" {k}={v}" for k, v in attrs.items()),
+        )
+
+
+def record_llm_usage(message: Any) -> None:
+    """Attribute an Anthropic response's token usage to the innermost active stage."""
+    span = _current_span.get()
+    if span is None:
+        return
+    span.llm_calls += 1
+    usage = getattr(message, "usage", None)
+    if usage is not None:
+        span.input_tokens += int(getattr(usage, "input_tokens", 0) or 0)
+        span.output_tokens += int(getattr(usage, "output_tokens", 0) or 0)
+
+
+def record_cache_hit() -> None:
+    """Count a cache hit (article cache, report reuse, coalesced run) on the innermost active stage."""
+    span = _current_span.get()
+    if span is not None:
+        span.cache_hits += 1
+
+
+# =============================================================================
+# DEADLINES, RETRIES AND HEDGING (outbound Claude / Tavily calls)
+# =============================================================================
+# /research sets a per-request deadline (RESEARCH_DEADLINE_S, below gunicorn's 300 s worker
+# timeout) that reaches every helper through a contextvar. Each outbound call gets a timeout of
+# min(its own cap, time left - _DEADLINE_RESERVE_S), so the pipeline always keeps enough time to
+# save a partial result instead of being killed mid-request.
+_request_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+_DEADLINE_RESERVE_S = 3.0
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline leaves no time for another outbound call."""
+
+
+def deadline_remaining() -> float:
+    """Seconds until the current request's deadline (``inf`` when none is set)."""
+    deadline = _request_deadline.get()
+    return math.inf if deadline is None else deadline - time.monotonic()
+
+
+def call_timeout(cap_s: float, deadline: Optional[float] = None) -> float:
+    """Timeout for one outbound call: ``cap_s``, bounded by the request deadline and ``deadline``."""
+    remaining = deadline_remaining() - _DEADLINE_RESERVE_S
+    if deadline is not None:
+        remaining = min(remaining, deadline - time.monotonic())
+    if remaining <= 0:
+        raise DeadlineExceeded("request deadline reached")
+    return min(cap_s, remaining)
+
+
+def _backoff_s(attempt: int, base_s: float = 0.5, cap_s: float = 8.0) -> float:
+    """Full-jitter exponential backoff, so retries from concurrent requests don't line up."""
+    return random.uniform(0.0, min(cap_s, base_s * 2 ** attempt))
+
+
+def note_degraded(stage_name: str) -> None:
+    """Record on the current trace that ``stage_name`` fell back to a partial/local result."""
+    trace = _current_trace.get()
+    if trace is not None:
+        degraded = trace.attrs.setdefault("degraded", [])
+        if stage_name not in degraded:
+            degraded.append(stage_name)
+
+
+async def _hedged(make_call: Callable[[], Awaitable[Any]], hedge_after_s: float, site: str) -> Any:
+    """Start a second identical call if the first hasn't finished after ``hedge_after_s``.
+
+    The first successful result wins and the other call is cancelled; if both fail, the
+    last error is raised.
+    """
+    first = asyncio.ensure_future(make_call())
+    done, _ = await asyncio.wait({first}, timeout=hedge_after_s)
+    if done:
+        return first.result()
+    LLM_HEDGES.labels(site=site).inc()
+    pending = {first, asyncio.ensure_future(make_call())}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+# =============================================================================
+# LLM SCHEDULER (rate-limit governor with priority classes)
+# =============================================================================
+# Every Claude call is admitted by one scheduler per worker process. It keeps a token bucket
+# for requests/minute and one for tokens/minute (prompt estimate + max_tokens, corrected with
+# the real usage afterwards) and caps in-flight calls. Waiting calls are admitted strictly by
+# priority class, so a burst of /research runs queues behind interactive calls instead of
+# starving them. A 429/529 pauses admission for everyone until the provider's retry-after;
+# the scheduler owns retries (the SDK client is created with max_retries=0).
+# Limits apply per worker: divide the account limits by the number of gunicorn workers.
+LLM_PRIORITY_INTERACTIVE = 0
+LLM_PRIORITY_REPORT = 1
+LLM_PRIORITY_BACKGROUND = 2
+_LLM_PRIORITY_NAMES = ("interactive", "report", "background")
+
+_LLM_SITE_PRIORITY = {
+    "generate_title": LLM_PRIORITY_INTERACTIVE,
+    "plan_research": LLM_PRIORITY_INTERACTIVE,
+    "comparison_followup": LLM_PRIORITY_INTERACTIVE,
+    "extract_research_questions": LLM_PRIORITY_INTERACTIVE,
+    "generate_report_from_facts": LLM_PRIORITY_REPORT,
+    "generate_report_section": LLM_PRIORITY_REPORT,
+    "extract_facts_from_sources": LLM_PRIORITY_REPORT,
+    "generate_article_comparison_report": LLM_PRIORITY_REPORT,
+    "compare_map_section": LLM_PRIORITY_REPORT,
+    "deep_research_gaps": LLM_PRIORITY_REPORT,
+}
+
+# Model per latency/cost tier; LLM_MODEL_FAST / LLM_MODEL_STANDARD override the defaults.
+_LLM_MODEL_TIERS = {
+    "fast": os.getenv("LLM_MODEL_FAST") or "claude-haiku-4-5",
+    "standard": os.getenv("LLM_MODEL_STANDARD") or "claude-sonnet-4-5",
+}
+
+# Call site -> (tier, default max_tokens). Short structured helpers run on the fast tier;
+# anything the user reads as prose or that grounds the report stays on the standard one.
+_LLM_SITE_ROUTES: Dict[str, Tuple[str, int]] = {
+    "generate_title": ("fast", 15),
+    "plan_research": ("fast", 400),
+    "multi_query_search": ("fast", 150),
+    "evaluate_and_refine_sources": ("fast", 80),
+    "extract_research_questions": ("fast", 200),
+    "generate_followups": ("fast", 200),
+    "summarize_conversation": ("fast", 150),
+    "generate_chart_from_facts": ("fast", 400),
+    "deep_research_gaps": ("fast", 200),
+    "extract_facts_from_sources": ("standard", 1000),
+    "generate_report_from_facts": ("standard", 3500),
+    "generate_report_section": ("standard", 1100),
+    "generate_article_comparison_report": ("standard", 7000),
+    "compare_map_section": ("standard", 900),
+    "comparison_followup": ("standard", 1500),
+}
+_LLM_DEFAULT_ROUTE = ("standard", 2000)
+
+
+def _load_llm_route_overrides() -> Dict[str, Dict[str, Any]]:
+    """``LLM_ROUTES`` JSON, e.g. ``{"generate_followups": {"tier": "standard"}, "generate_title": {"model": "...", "max_tokens": 20}}``."""
+    raw = os.getenv("LLM_ROUTES", "").strip()
+    if not raw:
+        return {}
+    try:
+        parsed = json.loads(raw)
+        if not isinstance(parsed, dict):
+            raise ValueError("expected a JSON object keyed by call site")
+        return {site: route for site, route in parsed.items() if isinstance(route, dict)}
+    except ValueError as e:
+        logger.error("Ignoring invalid LLM_ROUTES: %s", e)
+        return {}
+
+
+_LLM_ROUTE_OVERRIDES = _load_llm_route_overrides()
+
+
+def llm_route(site: str) -> Tuple[str, int]:
+    """``(model, max_tokens)`` for a call site: ``LLM_ROUTES`` entry, else the current research
+    mode's profile (see ``RESEARCH_MODES``), else the routing table."""
+    tier, max_tokens = _LLM_SITE_ROUTES.get(site, _LLM_DEFAULT_ROUTE)
+    profile = research_profile()
+    if profile["fast_llm"] and site in _FAST_LLM_SITES:
+        tier = "fast"
+    max_tokens = profile["max_tokens"].get(site, max_tokens)
+    override = _LLM_ROUTE_OVERRIDES.get(site, {})
+    tier = override.get("tier", tier)
+    model = override.get("model") or _LLM_MODEL_TIERS.get(tier) or _LLM_MODEL_TIERS["standard"]
+    return model, int(override.get("max_tokens") or max_tokens)
+
+
+# Per-site caps for one attempt; other sites use LLM_CALL_TIMEOUT_S.
+_LLM_SITE_TIMEOUT_S = {
+    "generate_title": 15.0,
+    "plan_research": 20.0,
+    "generate_report_from_facts": 150.0,
+    "generate_article_comparison_report": 180.0,
+}
+
+# Short helper calls whose tail latency sits on the critical path; hedged when LLM_HEDGE_AFTER_S > 0.
+_LLM_HEDGED_SITES = frozenset({
+    "generate_title",
+    "plan_research",
+    "multi_query_search",
+    "evaluate_and_refine_sources",
+    "generate_followups",
+    "summarize_conversation",
+})
+
+
+class LLMQueueTimeout(RuntimeError):
+    """A Claude call waited longer than ``LLM_QUEUE_TIMEOUT_S`` for a scheduler slot."""
+
+
+class _TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = max(1.0, per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_s(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        # Negative refunds (usage above the estimate) leave the bucket in debt; later calls wait it out.
+        self.level = min(self.capacity, self.level + amount)
+
+
+def _retry_after_s(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int,
+        queue_timeout_s: float,
+        max_attempts: int,
+    ):
+        self._requests = _TokenBucket(requests_per_minute)
+        self._tokens = _TokenBucket(tokens_per_minute)
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout_s = queue_timeout_s
+        self.max_attempts = max(1, max_attempts)
+        self._waiting: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._seq = 0
+        self._queued = Counter()
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "queued": {name: self._queued[p] for p, name in enumerate(_LLM_PRIORITY_NAMES)},
+            "paused_for_s": round(max(0.0, self._paused_until - now), 2),
+            "requests_wait_s": round(self._requests.wait_s(1, now), 2),
+            "tokens_available": int(self._tokens.level),
+        }
+
+    def _dequeued(self, priority: int) -> None:
+        self._queued[priority] -= 1
+        LLM_QUEUE_DEPTH.labels(priority=_LLM_PRIORITY_NAMES[priority]).dec()
+
+    def _pump(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._waiting:
+            priority, _, cost, fut = self._waiting[0]
+            if fut.done():  # timed out or cancelled; already counted out of the queue
+                heapq.heappop(self._waiting)
+                continue
+            if self._in_flight >= self.max_concurrency:
+                return  # _release() pumps again
+            wait = max(self._paused_until - now, self._requests.wait_s(1, now), self._tokens.wait_s(cost, now))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+                return
+            heapq.heappop(self._waiting)
+            self._requests.take(1)
+            self._tokens.take(cost)
+            self._in_flight += 1
+            self._dequeued(priority)
+            fut.set_result(None)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._pump()
+
+    async def _acquire(self, priority: int, cost: float, timeout_s: float) -> None:
+        fut = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._waiting, (priority, self._seq, cost, fut))
+        self._queued[priority] += 1
+        LLM_QUEUE_DEPTH.labels(priority=_LLM_PRIORITY_NAMES[priority]).inc()
+        started = time.monotonic()
+        self._pump()
+        try:
+            await asyncio.wait_for(fut, timeout_s)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                self._release()  # granted just as we gave up
+            else:
+                self._dequeued(priority)
+            if isinstance(e, asyncio.TimeoutError):
+                raise LLMQueueTimeout(f"no LLM slot within {timeout_s:.0f}s") from None
+            raise
+        finally:
+            LLM_QUEUE_WAIT_SECONDS.labels(priority=_LLM_PRIORITY_NAMES[priority]).observe(time.monotonic() - started)
+
+    async def create(self, site: str, priority: int, **kwargs: Any) -> Any:
+        """Admit, run ``_claude_create`` in a worker thread, and retry rate limits / transient errors.
+
+        Queueing and each attempt are bounded by the request deadline; attempts are also capped
+        at the site's timeout (``_LLM_SITE_TIMEOUT_S`` or ``LLM_CALL_TIMEOUT_S``).
+        """
+        prompt_chars = len(kwargs.get("system") or "") + sum(len(str(m.get("content", ""))) for m in kwargs.get("messages", []))
+        cost = prompt_chars / 4 + kwargs.get("max_tokens", 0)
+        cap_s = _LLM_SITE_TIMEOUT_S.get(site) or _env_float("LLM_CALL_TIMEOUT_S", 60.0, 1.0)
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._acquire(priority, cost, min(self.queue_timeout_s, call_timeout(math.inf)))
+            try:
+                timeout = call_timeout(cap_s)
+                message = await asyncio.wait_for(
+                    asyncio.to_thread(_claude_create, site, timeout=timeout, **kwargs), timeout=timeout + 1.0
+                )
+                usage = getattr(message, "usage", None)
+                if usage is not None:
+                    used = int(getattr(usage, "input_tokens", 0) or 0) + int(getattr(usage, "output_tokens", 0) or 0)
+                    self._tokens.refund(cost - used)
+                return message
+            except anthropic.APIStatusError as e:
+                retryable = e.status_code in (429, 529) or e.status_code >= 500
+                if not retryable or attempt >= self.max_attempts:
+                    raise
+                delay = _retry_after_s(e) or _backoff_s(attempt, base_s=1.0, cap_s=30.0)
+                if e.status_code in (429, 529):
+                    # The provider limit is shared by every caller: stop admitting until it clears.
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                    LLM_RATE_LIMITED.labels(site=site, status=str(e.status_code)).inc()
+                    delay = 0.0
+                logger.warning("Claude %s for %s (attempt %d/%d); retrying", e.status_code, site, attempt, self.max_attempts)
+            except (anthropic.APIConnectionError, asyncio.TimeoutError) as e:
+                # APITimeoutError is an APIConnectionError; a bare TimeoutError means the SDK overran
+                # its own timeout. DeadlineExceeded means there is no budget left to retry.
+                if attempt >= self.max_attempts or isinstance(e, DeadlineExceeded):
+                    raise
+                delay = _backoff_s(attempt)
+                logger.warning("Claude timeout/connection error for %s (attempt %d/%d): %r", site, attempt, self.max_attempts, e)
+            finally:
+                self._release()
+            if delay:
+                await asyncio.sleep(delay)
+
+
+llm_scheduler = LLMScheduler(
+    requests_per_minute=_env_float("LLM_REQUESTS_PER_MINUTE", 200.0, 1.0),
+    tokens_per_minute=_env_float("LLM_TOKENS_PER_MINUTE", 200_000.0, 1000.0),
+    max_concurrency=_env_int("LLM_MAX_CONCURRENCY", 12, 1),
+    queue_timeout_s=_env_float("LLM_QUEUE_TIMEOUT_S", 90.0, 1.0),
+    max_attempts=_env_int("LLM_MAX_ATTEMPTS", 3, 1),
+)
+
+
+def _blocking_io_executor() -> ThreadPoolExecutor:
+    """Default executor for ``asyncio.to_thread``, installed at startup.
+
+    Every admitted Claude call holds a thread for its whole duration, and Tavily and
+    Supabase calls share the same pool. The stock executor (``min(32, cpu + 4)`` threads,
+    5 on a 1-CPU instance) would cap in-flight LLM calls well below ``llm_scheduler``'s
+    ``max_concurrency``, so the pool keeps BLOCKING_IO_THREADS threads, and never fewer
+    than the scheduler's slots plus headroom for search and database calls.
+    """
+    workers = max(_env_int("BLOCKING_IO_THREADS", 64, 4), llm_scheduler.max_concurrency + 16)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blocking-io")
+
+
 # --- Claude Helper ---
-def call_claude(
+def _claude_create(site: str, **kwargs: Any) -> Any:
+    """``claude_client.messages.create`` with per-call-site latency/token metrics and span usage.
+
+    Blocking; only ``LLMScheduler.create`` calls it, from a worker thread.
+    """
+    if not claude_client:
+        raise RuntimeError("Claude client not initialized. Check ANTHROPIC_API_KEY.")
+    started = time.monotonic()
+    outcome = "error"
+    try:
+        message = claude_client.messages.create(**kwargs)
+        outcome = "ok"
+    finally:
+        LLM_CALL_SECONDS.labels(site=site, model=kwargs.get("model", ""), outcome=outcome).observe(time.monotonic() - started)
+    usage = getattr(message, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.labels(site=site, direction="input").inc(int(getattr(usage, "input_tokens", 0) or 0))
+        LLM_TOKENS.labels(site=site, direction="output").inc(int(getattr(usage, "output_tokens", 0) or 0))
+    record_llm_usage(message)
+    return message
+
+
+async def aclaude_create(site: str, priority: Optional[int] = None, **kwargs: Any) -> Any:
+    """Raw ``messages.create`` through the LLM scheduler; ``priority`` defaults from the call site."""
+    if priority is None:
+        priority = _LLM_SITE_PRIORITY.get(site, LLM_PRIORITY_BACKGROUND)
+    hedge_after_s = _env_float("LLM_HEDGE_AFTER_S", 0.0)
+    if hedge_after_s > 0 and site in _LLM_HEDGED_SITES:
+        return await _hedged(lambda: llm_scheduler.create(site, priority, **kwargs), hedge_after_s, site)
+    return await llm_scheduler.create(site, priority, **kwargs)
+
+
+async def acall_claude(
     system_prompt: str,
     user_content: str,
-    max_tokens: int = 2000,
+    max_tokens: Optional[int] = None,
     temperature: Optional[float] = None,
+    site: str = "other",
+    priority: Optional[int] = None,
 ) -> str:
-    """Synchronous Claude API call. Returns text content."""
-    if not claude_client:
-        raise RuntimeError("Claude client not initialized. Check ANTHROPIC_API_KEY.")
+    """Claude call through the LLM scheduler. Returns text content. ``site`` labels the call in
+    metrics and picks its priority class unless ``priority`` is given, and its model and default
+    ``max_tokens`` from ``llm_route``."""
+    model, site_max_tokens = llm_route(site)
     kwargs: Dict[str, Any] = {
-        "model": "claude-sonnet-4-5",
-        "max_tokens": max_tokens,
+        "model": model,
+        "max_tokens": max_tokens or site_max_tokens,
         "messages": [{"role": "user", "content": user_content}],
         "system": system_prompt,
     }
     if temperature is not None:
         kwargs["temperature"] = temperature
-    message = claude_client.messages.create(**kwargs)
+    message = await aclaude_create(site, priority, **kwargs)
     return message.content[0].text
 
+
+# --- Tavily Helper ---
+def tavily_call(operation: str, **kwargs: Any) -> Any:
+    """Call ``tavily_client.<operation>`` (search / extract) with latency and error metrics."""
+    started = time.monotonic()
+    try:
+        return getattr(tavily_client, operation)(**kwargs)
+    except Exception:
+        TAVILY_ERRORS.labels(operation=operation).inc()
+        raise
+    finally:
+        TAVILY_CALL_SECONDS.labels(operation=operation).observe(time.monotonic() - started)
+
+
+def _tavily_retryable(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, TavilyTimeoutError)) and not isinstance(error, DeadlineExceeded):
+        return True
+    if isinstance(error, OSError):  # requests' ConnectionError / HTTPError
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        return status is None or status >= 500
+    return False
+
+
+async def atavily_call(operation: str, deadline: Optional[float] = None, **kwargs: Any) -> Any:
+    """``tavily_call`` in a worker thread with a per-call timeout and jittered retries.
+
+    Each attempt is capped at ``TAVILY_CALL_TIMEOUT_S`` and bounded by the request deadline
+    and ``deadline`` (``time.monotonic()`` based). Timeouts, connection errors and 5xx are
+    retried up to ``TAVILY_MAX_ATTEMPTS`` attempts in total.
+    """
+    cap_s = _env_float("TAVILY_CALL_TIMEOUT_S", 20.0, 1.0)
+    attempts = _env_int("TAVILY_MAX_ATTEMPTS", 2, 1)
+    for attempt in range(1, attempts + 1):
+        timeout = call_timeout(cap_s, deadline)
+        try:
+            return await asyncio.wait_for(
+                asyncio.to_thread(tavily_call, operation, timeout=max(1, math.ceil(timeout)), **kwargs),
+                timeout=timeout + 0.5,
+            )
+        except Exception as e:
+            if attempt >= attempts or not _tavily_retryable(e):
+                raise
+            logger.warning("Tavily %s failed (attempt %d/%d): %r; retrying", operation, attempt, attempts, e)
+        await asyncio.sleep(_backoff_s(attempt))
+
+# =============================================================================
+# SOURCE DEDUPLICATION (URL canonicalization + MinHash near-duplicates)
+# =============================================================================
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmi",
+    "ref", "ref_src", "ref_url", "referrer", "cmpid", "ncid", "ocid", "sr_share",
+    "amp", "outputtype", "usqp", "amp_js_v", "amp_gsa",
+})
+_TRACKING_PARAM_PREFIXES = ("utm_", "pk_", "mtm_", "hsa_", "__twitter", "at_")
+_HOST_ALIAS_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+_AMP_PATH_RE = re.compile(r"/amp/?$|\.amp(?=\.html?$)|^/amp(?=/)", re.IGNORECASE)
+
+
+def canonical_url(url: str) -> str:
+    """Key that is equal for trivially different URLs of the same document.
+
+    Ignores scheme, ``www.``/mobile/AMP host aliases, default ports, fragments, tracking
+    query parameters (``utm_*``, ``fbclid``, …), query order, trailing slashes and AMP path
+    variants; Google AMP cache URLs map back to the publisher URL. Only used for
+    comparison, the original URL is what gets fetched and cited.
+    """
+    try:
+        parts = urlparse((url or "").strip())
+        host = (parts.hostname or "").lower().rstrip(".")
+    except ValueError:
+        return (url or "").strip()
+    if not host:
+        return (url or "").strip()
+    path = parts.path or "/"
+    if host.endswith(".cdn.ampproject.org"):
+        # /c/s/example.com/path → example.com/path
+        m = re.match(r"^/[a-z](?:/s)?/([^/]+)(/.*)?$", path)
+        if m:
+            host, path = m.group(1).lower(), m.group(2) or "/"
+    for prefix in _HOST_ALIAS_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+            break
+    path = _AMP_PATH_RE.sub("", re.sub(r"/{2,}", "/", path)).rstrip("/")
+    query = "&".join(sorted(
+        pair for pair in parts.query.split("&")
+        if pair and not (
+            pair.split("=", 1)[0].lower() in _TRACKING_PARAMS
+            or pair.split("=", 1)[0].lower().startswith(_TRACKING_PARAM_PREFIXES)
+        )
+    ))
+    return f"{host}{path}" + (f"?{query}" if query else "")
+
+
+_MINHASH_PERMUTATIONS = 64
+_MINHASH_PRIME = (1 << 61) - 1
+# Fixed seed so signatures are comparable across processes and restarts.
+_MINHASH_PARAMS = [
+    (rng.randrange(1, _MINHASH_PRIME), rng.randrange(0, _MINHASH_PRIME))
+    for rng in [random.Random(0x5EED)] for _ in range(_MINHASH_PERMUTATIONS)
+]
+
+
+def minhash_signature(tokens: List[str], shingle_size: int = 3) -> Tuple[int, ...]:
+    """MinHash signature of the word shingles of ``tokens`` (e.g. from ``_tokenize``).
+
+    The fraction of equal positions between two signatures estimates the Jaccard
+    similarity of their shingle sets. Returns ``()`` when there are no tokens.
+    """
+    if not tokens:
+        return ()
+    k = min(shingle_size, len(tokens))
+    shingles = {zlib.crc32(" ".join(tokens[i:i + k]).encode("utf-8")) for i in range(len(tokens) - k + 1)}
+    return tuple(min((a * h + b) % _MINHASH_PRIME for h in shingles) for a, b in _MINHASH_PARAMS)
+
+
+def minhash_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two ``minhash_signature`` results (0.0 if either is empty)."""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+# Snippets shorter than this are too small for a meaningful content comparison.
+_NEAR_DUP_MIN_TOKENS = 12
+
+
+def collapse_duplicate_sources(sources: List[Dict], threshold: Optional[float] = None) -> List[Dict]:
+    """Drop sources whose canonical URL or snippet text repeats a better source.
+
+    Each cluster of same-canonical-URL or near-duplicate (MinHash similarity of title +
+    content >= ``threshold``) results keeps its highest ``quality_score`` member; ties go
+    to the earlier result. Survivors keep their original order.
+    """
+    if len(sources) < 2:
+        return list(sources)
+    if threshold is None:
+        threshold = _env_float("SOURCE_DUP_THRESHOLD", 0.8)
+    ranked = sorted(range(len(sources)), key=lambda i: -(sources[i].get("quality_score") or 0))
+    kept: List[int] = []
+    kept_urls: set = set()
+    kept_sigs: List[Tuple[int, ...]] = []
+    for i in ranked:
+        s = sources[i]
+        key = canonical_url(s.get("url", ""))
+        if key in kept_urls:
+            continue
+        tokens = _tokenize(f"{s.get('title', '')} {s.get('content', '')}")
+        sig = minhash_signature(tokens) if len(tokens) >= _NEAR_DUP_MIN_TOKENS else ()
+        if sig and any(minhash_similarity(sig, other) >= threshold for other in kept_sigs):
+            continue
+        kept.append(i)
+        kept_urls.add(key)
+        if sig:
+            kept_sigs.append(sig)
+    if len(kept) < len(sources):
+        logger.info("Collapsed %d duplicate source(s) out of %d", len(sources) - len(kept), len(sources))
+    return [sources[i] for i in sorted(kept)]
+
+
+# =============================================================================
+# RESEARCH MODES (pipeline profile + wall-clock budget per /research request)
+# =============================================================================
+# sub_queries: searches per run; max_sources: source cap after reranking; refine: run
+# evaluate_and_refine_sources; fast_llm: put facts/report on the fast model tier;
+# max_tokens: per-site overrides of _LLM_SITE_ROUTES; deadline_s: default wall-clock budget;
+# rounds / branches / max_total_sources: deep_research_rounds limits (0 rounds = off);
+# parallel_sections: write the report section by section (generate_report_by_sections).
+RESEARCH_MODES: Dict[str, Dict[str, Any]] = {
+    "quick": {
+        "search_depth": "basic",
+        "sub_queries": 1,
+        "results_per_query": 6,
+        "max_sources": 5,
+        "refine": False,
+        "chart": False,
+        "fast_llm": True,
+        "max_tokens": {"extract_facts_from_sources": 600, "generate_report_from_facts": 1200, "generate_report_section": 400},
+        "deadline_s": 25.0,
+        "rounds": 0,
+        "branches": 0,
+        "max_total_sources": 5,
+        "parallel_sections": False,
+    },
+    "standard": {
+        "search_depth": "advanced",
+        "sub_queries": 3,
+        "results_per_query": 5,
+        "max_sources": 8,
+        "refine": True,
+        "chart": True,
+        "fast_llm": False,
+        "max_tokens": {},
+        "deadline_s": 240.0,
+        "rounds": 0,
+        "branches": 0,
+        "max_total_sources": 8,
+        "parallel_sections": False,
+    },
+    "deep": {
+        "search_depth": "advanced",
+        "sub_queries": 5,
+        "results_per_query": 7,
+        "max_sources": 12,
+        "refine": True,
+        "chart": True,
+        "fast_llm": False,
+        "max_tokens": {"extract_facts_from_sources": 1800, "generate_report_from_facts": 5000, "generate_report_section": 1600},
+        "deadline_s": 420.0,
+        "rounds": 2,
+        "branches": 3,
+        "max_total_sources": 30,
+        "parallel_sections": True,
+    },
+}
+# Sites that fast_llm moves to the fast tier (the rest of a run is routed as usual).
+_FAST_LLM_SITES = frozenset({"extract_facts_from_sources", "generate_report_from_facts", "generate_report_section"})
+
+_research_mode: contextvars.ContextVar[str] = contextvars.ContextVar("research_mode", default="standard")
+
+
+def research_profile() -> Dict[str, Any]:
+    """Profile of the current request's research mode (``standard`` outside ``/research``)."""
+    return RESEARCH_MODES[_research_mode.get()]
+
+
+def research_source_cap() -> int:
+    """Final number of sources for the current mode; RESEARCH_MAX_SOURCES overrides the standard one."""
+    if _research_mode.get() == "standard":
+        return _env_int("RESEARCH_MAX_SOURCES", RESEARCH_MODES["standard"]["max_sources"], 1)
+    return research_profile()["max_sources"]
+
+
+def research_deadline_s(mode: str) -> float:
+    """Wall-clock budget for a run: RESEARCH_<MODE>_DEADLINE_S (RESEARCH_DEADLINE_S for standard)."""
+    name = "RESEARCH_DEADLINE_S" if mode == "standard" else f"RESEARCH_{mode.upper()}_DEADLINE_S"
+    return _env_float(name, RESEARCH_MODES[mode]["deadline_s"], 10.0)
+
+
 # =============================================================================
 # STEP 1 — MULTI-QUERY SEARCH WITH SOURCE SCORING
 # =============================================================================
@@ -351,118 +1496,269 @@ def _published_date_for_tavily_result(r: Dict) -> str:
     return "n.d."
 
 
+class _DomainReputationIndex:
+    """Source-quality tiers keyed on domain suffix, loaded from a ``<tier> <domain>`` data file.
+
+    An entry matches the host and all of its subdomains; the longest matching suffix wins.
+    Lookup walks the host's labels from the full name down to the TLD, so it costs one
+    dict probe per label however many entries the file has. The file's mtime is checked
+    at most every ``reload_interval_s`` and the table is swapped in whole when it changes.
+    """
+
+    def __init__(self, path: str, reload_interval_s: float):
+        self.path = path
+        self.reload_interval_s = reload_interval_s
+        self._tiers: Dict[str, int] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return
+            tiers: Dict[str, int] = {}
+            with open(self.path, encoding="utf-8") as f:
+                for lineno, line in enumerate(f, 1):
+                    line = line.split("#", 1)[0].strip()
+                    if not line:
+                        continue
+                    try:
+                        tier, domain = line.split()
+                        tiers[domain.lower().strip(".")] = int(tier)
+                    except ValueError:
+                        logger.warning("Domain reputation %s:%d: cannot parse %r", self.path, lineno, line)
+        except OSError as e:
+            # Keep serving the last good table; an empty one scores every source 0.
+            logger.error("Could not load domain reputation file %s: %s", self.path, e)
+            return
+        self._tiers, self._mtime = tiers, mtime
+        logger.info("Loaded %d domain reputation entries from %s", len(tiers), self.path)
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval_s and self._mtime is not None:
+            return
+        with self._lock:
+            if now - self._checked_at < self.reload_interval_s and self._mtime is not None:
+                return
+            self._checked_at = now
+            self._load()
+
+    def tier(self, host: str) -> int:
+        self._maybe_reload()
+        labels = (host or "").lower().strip(".").split(".")
+        tiers = self._tiers
+        for i in range(len(labels)):
+            tier = tiers.get(".".join(labels[i:]))
+            if tier is not None:
+                return tier
+        return 0
+
+    def __len__(self) -> int:
+        return len(self._tiers)
+
+
+domain_reputation = _DomainReputationIndex(
+    path=os.getenv("DOMAIN_REPUTATION_PATH") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "domain_reputation.txt"),
+    reload_interval_s=_env_float("DOMAIN_REPUTATION_RELOAD_S", 60.0),
+)
+
+
 def score_source(url: str) -> int:
-    """Score source quality. Higher = more credible."""
-    url_lower = url.lower()
-    if any(x in url_lower for x in [".edu", ".ac.", "scholar.google", "pubmed", "jstor",
-                                      "sciencedirect", "springer", "wiley", "nature.com",
-                                      "researchgate", "arxiv",
-                                      "ncbi.nlm.nih.gov", "who.int", "un.org", "worldbank.org",
-                                      "oecd.org", "jstor.org", "semanticscholar.org", "ssrn.com"]):
-        score = 3  # Academic
-    elif any(x in url_lower for x in [".gov", ".org"]):
-        score = 2  # Government / NGO
-    elif any(x in url_lower for x in ["bbc.", "reuters.", "guardian.", "nytimes.", "economist.",
-                                       "ft.com", "wsj.com", "theatlantic"]):
-        score = 1  # Quality news
-    else:
-        score = 0  # Blog / unknown
-    logger.info("Source scored %d: %s", score, url)
+    """Score source quality from the domain reputation index. Higher = more credible
+    (3 academic, 2 government / NGO, 1 quality news, 0 blog / unknown)."""
+    try:
+        host = urlparse(url).hostname or ""
+    except ValueError:
+        host = ""
+    score = domain_reputation.tier(host)
+    logger.debug("Source scored %d: %s", score, url)
     return score
 
-async def multi_query_search(question: str) -> List[Dict]:
+
+async def multi_query_search(question: str, planned_queries: Optional[List[str]] = None) -> List[Dict]:
     """
-    Runs 3 Claude-generated targeted sub-queries, deduplicates by URL,
-    scores each source for quality, and returns the top 8.
+    Runs the mode's targeted sub-queries (3 Claude-generated for standard), deduplicates by URL
+    and content, scores each source for quality, and returns the mode's top sources after reranking.
+    ``planned_queries`` (from ``plan_research``) skips the sub-query generation call.
     """
     if not tavily_client:
         logger.error("Tavily client not initialized")
         return []
 
+    profile = research_profile()
+    n_queries = profile["sub_queries"]
     sub_queries = [
         question,
         f"{question} recent evidence data statistics",
         f"{question} academic research systematic review",
     ]
-    gen_system = """Return a JSON array of exactly 3 search queries for the given research question. Query 1: core topic with academic signal. Query 2: recent evidence and data. Query 3: peer-reviewed research angle. Return only valid JSON. No explanation."""
+    if n_queries == 1:
+        sub_queries = [question]
+    elif planned_queries:
+        sub_queries = planned_queries[:3] + sub_queries[len(planned_queries):]
+    else:
+        gen_system = """Return a JSON array of exactly 3 search queries for the given research question. Query 1: core topic with academic signal. Query 2: recent evidence and data. Query 3: peer-reviewed research angle. Return only valid JSON. No explanation."""
 
-    gen_user = f"Research question:\n{question}\n\nReturn JSON array only, e.g. [\"query1\", \"query2\", \"query3\"]"
-    try:
-        raw_q = call_claude(gen_system, gen_user, max_tokens=150)
-        clean_q = raw_q.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
-        parsed = json.loads(clean_q)
-        if isinstance(parsed, list):
-            qs = [q.strip() for q in parsed if isinstance(q, str) and q.strip()]
-            if len(qs) >= 3:
-                sub_queries = qs[:3]
-            elif qs:
-                sub_queries = qs + sub_queries[len(qs):]
-    except Exception as e:
-        logger.warning("Sub-query generation failed, using fallback queries: %s", e)
+        gen_user = f"Research question:\n{question}\n\nReturn JSON array only, e.g. [\"query1\", \"query2\", \"query3\"]"
+        try:
+            with stage("subquery_generation"):
+                raw_q = await acall_claude(gen_system, gen_user, site="multi_query_search")
+            clean_q = raw_q.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
+            parsed = json.loads(clean_q)
+            if isinstance(parsed, list):
+                qs = [q.strip() for q in parsed if isinstance(q, str) and q.strip()]
+                if len(qs) >= 3:
+                    sub_queries = qs[:3]
+                elif qs:
+                    sub_queries = qs + sub_queries[len(qs):]
+        except Exception as e:
+            logger.warning("Sub-query generation failed, using fallback queries: %s", e)
+    if n_queries > len(sub_queries):
+        # Deep runs widen the net with fixed extra angles on top of the generated queries.
+        sub_queries += [
+            f"{question} {angle}"
+            for angle in ("policy implications case studies", "criticism limitations debate", "historical background trends")
+        ][:n_queries - len(sub_queries)]
+
+    async def _search(i: int, query: str) -> Dict:
+        with stage("tavily_search", purpose=f"subquery_{i}"):
+            return await atavily_call(
+                "search", query=query, search_depth=profile["search_depth"], max_results=profile["results_per_query"],
+            )
+
+    # The sub-queries are independent; results are merged in query order so dedup stays stable.
+    responses = await asyncio.gather(*(_search(i, q) for i, q in enumerate(sub_queries, 1)), return_exceptions=True)
 
     all_results = []
     seen_urls = set()
 
-    for query in sub_queries:
-        try:
-            response = tavily_client.search(
-                query=query,
-                search_depth="advanced",
-                max_results=5,
-            )
-            for r in response.get("results", []):
-                url = r.get("url", "")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
-                    r["published_date"] = _published_date_for_tavily_result(r)
-                    r["quality_score"] = score_source(url)
-                    all_results.append(r)
-        except Exception as e:
-            logger.error("Tavily search error for query '%s': %s", query, e)
+    for query, response in zip(sub_queries, responses):
+        if isinstance(response, BaseException):
+            logger.error("Tavily search error for query '%s': %s", query, response)
+            continue
+        for r in response.get("results", []):
+            url = r.get("url", "")
+            if url and canonical_url(url) not in seen_urls:
+                seen_urls.add(canonical_url(url))
+                r["published_date"] = _published_date_for_tavily_result(r)
+                r["quality_score"] = score_source(url)
+                all_results.append(r)
 
-    # Sort by quality score descending, keep top 8
-    sorted_results = sorted(all_results, key=lambda x: x.get("quality_score", 0), reverse=True)
-    top_results = sorted_results[:8]
+    # Keep the best distinct documents by relevance, quality tier, recency and host diversity
+    top_results = rerank_sources(question, collapse_duplicate_sources(all_results), limit=profile["max_sources"])
 
     logger.info("Multi-query search: %d total results → %d after dedup/scoring", len(all_results), len(top_results))
     return top_results
 
 
-async def evaluate_and_refine_sources(research_question: str, sources: List[Dict]) -> List[Dict]:
-    """
-    Optionally augments sources when count is low, asks Claude whether coverage is sufficient,
-    runs one targeted Tavily search for a missing angle if needed, returns up to 10 sources.
+_YEAR_RE = re.compile(r"\b(19[5-9]\d|20\d\d)\b")
+# Weights of the local sufficiency components; they sum to 1 so the score stays in [0, 1].
+_SUFFICIENCY_WEIGHTS = {"count": 0.20, "diversity": 0.15, "quality": 0.25, "dates": 0.15, "terms": 0.25}
+
+
+def _source_sufficiency(question: str, sources: List[Dict]) -> Tuple[float, Dict[str, float], List[str]]:
+    """Cheap local estimate of whether ``sources`` cover ``question`` well enough to write from.
+
+    Combines source count, domain diversity, the ``quality_score`` distribution, date coverage
+    and how many question terms appear in the titles/snippets. Returns ``(score, components,
+    uncovered_terms)`` with every component in [0, 1].
     """
-    if not tavily_client:
-        return sources[:10] if sources else []
+    n = len(sources)
+    if not n:
+        return 0.0, {k: 0.0 for k in _SUFFICIENCY_WEIGHTS}, _tokenize(question)
+
+    hosts = {(urlparse(s.get("url") or "").hostname or "").removeprefix("www.") for s in sources}
+    hosts.discard("")
+    scores = [min(3, max(0, int(s.get("quality_score") or 0))) for s in sources]
+    years = []
+    for s in sources:
+        m = _YEAR_RE.search(str(s.get("published_date") or ""))
+        if m:
+            years.append(int(m.group(1)))
+    recent_from = time.gmtime().tm_year - 3
+
+    terms = list(dict.fromkeys(_tokenize(question)))
+    seen_tokens = set()
+    for s in sources:
+        seen_tokens.update(_tokenize(f"{s.get('title', '')} {s.get('content', '')}"))
+    uncovered = [t for t in terms if t not in seen_tokens]
+
+    components = {
+        "count": min(1.0, n / 6),
+        "diversity": len(hosts) / n,
+        "quality": 0.5 * (sum(scores) / (3 * n)) + 0.5 * (sum(1 for q in scores if q >= 2) / n),
+        "dates": 0.5 * (len(years) / n) + 0.5 * (1.0 if any(y >= recent_from for y in years) else 0.0),
+        "terms": 1.0 - len(uncovered) / len(terms) if terms else 1.0,
+    }
+    score = sum(_SUFFICIENCY_WEIGHTS[k] * v for k, v in components.items())
+    return score, components, uncovered
 
-    def _merge_tavily_results(existing: List[Dict], results: List[Dict]) -> List[Dict]:
-        seen = {s.get("url") for s in existing if s.get("url")}
-        out = list(existing)
-        for r in results:
-            url = r.get("url", "")
-            if url and url not in seen:
-                seen.add(url)
-                r["quality_score"] = score_source(url)
-                out.append(r)
-        return out
 
-    current = list(sources)
+def _local_missing_angle(components: Dict[str, float], uncovered_terms: List[str]) -> str:
+    """Search angle for a clearly thin source set, or "" when the gap is not obvious locally."""
+    if uncovered_terms:
+        return " ".join(uncovered_terms[:4])
+    if components["dates"] < 0.5:
+        return "recent evidence data statistics"
+    if components["quality"] < 0.4:
+        return "academic research systematic review"
+    return ""
 
-    if len(current) < 4:
-        try:
-            resp = tavily_client.search(
-                query=research_question,
-                search_depth="advanced",
-                max_results=5,
-            )
-            current = _merge_tavily_results(current, resp.get("results", []))
-        except Exception as e:
-            logger.error("Supplemental search (few sources) failed: %s", e)
 
+# Weights of the rerank components (each in [0, 1]) and the score taken off per earlier pick from the same host.
+_RERANK_WEIGHTS = {"relevance": 0.50, "quality": 0.35, "recency": 0.15}
+_RERANK_SAME_HOST_PENALTY = 0.15
+
+
+def rerank_sources(question: str, sources: List[Dict], limit: int) -> List[Dict]:
+    """Pick the ``limit`` best sources for ``question`` and return them best first.
+
+    Each source scores BM25 relevance of its title (counted twice) and snippet to the
+    question, normalised to the best candidate, plus its ``quality_score`` tier and the
+    recency of ``published_date``. Selection is greedy and takes ``_RERANK_SAME_HOST_PENALTY``
+    off a candidate for every source already picked from the same host, so one site
+    cannot fill the list. The final score is stored on each source as ``rank_score``.
+    """
+    if not sources:
+        return []
+    bm25 = _BM25([_tokenize(f"{s.get('title', '')} {s.get('title', '')} {s.get('content', '')}") for s in sources])
+    relevance = bm25.scores(_tokenize(question))
+    top_relevance = max(relevance) or 1.0
+    this_year = time.gmtime().tm_year
+
+    base = []
+    for s, rel in zip(sources, relevance):
+        m = _YEAR_RE.search(str(s.get("published_date") or ""))
+        recency = max(0.0, 1.0 - (this_year - int(m.group(1))) / 10) if m else 0.3
+        quality = min(3, max(0, int(s.get("quality_score") or 0))) / 3
+        base.append(
+            _RERANK_WEIGHTS["relevance"] * rel / top_relevance
+            + _RERANK_WEIGHTS["quality"] * quality
+            + _RERANK_WEIGHTS["recency"] * min(1.0, recency)
+        )
+    hosts = [(urlparse(s.get("url") or "").hostname or "").removeprefix("www.") for s in sources]
+
+    picked: List[Dict] = []
+    host_counts: Counter = Counter()
+    remaining = list(range(len(sources)))
+    while remaining and len(picked) < limit:
+        # max() keeps the earliest index on ties, so arrival order only breaks exact ties.
+        best = max(remaining, key=lambda i: base[i] - _RERANK_SAME_HOST_PENALTY * host_counts[hosts[i]])
+        remaining.remove(best)
+        host_counts[hosts[best]] += 1
+        sources[best]["rank_score"] = round(base[best], 4)
+        picked.append(sources[best])
+    return picked
+
+
+async def _llm_source_evaluation(research_question: str, sources: List[Dict]) -> Tuple[bool, str]:
+    """Ask Claude whether ``sources`` cover the question; returns ``(sufficient, missing_angle)``."""
     sources_preview = [
         {"index": i, "title": s.get("title", "")[:80], "domain": s.get("url", "").split("/")[2] if s.get("url") else ""}
-        for i, s in enumerate(current[:15], 1)
+        for i, s in enumerate(sources[:15], 1)
     ]
     eval_system = """You evaluate whether a set of web search results adequately covers a research question for writing a grounded research report.
 
@@ -474,22 +1770,85 @@ No markdown, no preamble."""
     eval_user = f"""Research question:
 {research_question}
 
-Sources found ({len(current)} total):
-{json.dumps(sources_preview)}
+Sources found ({len(sources)} total):
+{json.dumps(sources_preview)}
+
+If coverage is thin, missing_angle should name the concrete gap (e.g. "recent quantitative data", "clinical guidelines", "historical context")."""
+
+    sufficient = True
+    missing_angle = ""
+    try:
+        with stage("source_evaluation"):
+            raw_eval = await acall_claude(eval_system, eval_user, site="evaluate_and_refine_sources")
+        clean_eval = raw_eval.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
+        ev = json.loads(clean_eval)
+        if isinstance(ev, dict):
+            sufficient = bool(ev.get("sufficient", True))
+            missing_angle = (ev.get("missing_angle") or "").strip()
+    except Exception as e:
+        logger.warning("Source evaluation JSON failed, assuming sufficient: %s", e)
+
+    return sufficient, missing_angle
+
+
+async def evaluate_and_refine_sources(research_question: str, sources: List[Dict]) -> List[Dict]:
+    """
+    Optionally augments sources when count is low, scores coverage locally and only asks Claude
+    when that score is ambiguous, runs one targeted Tavily search for a missing angle if needed,
+    returns up to ``research_source_cap()`` reranked sources.
+    """
+    if not tavily_client:
+        return sources[:10] if sources else []
+
+    def _merge_tavily_results(existing: List[Dict], results: List[Dict]) -> List[Dict]:
+        seen = {canonical_url(s.get("url")) for s in existing if s.get("url")}
+        out = list(existing)
+        for r in results:
+            url = r.get("url", "")
+            if url and canonical_url(url) not in seen:
+                seen.add(canonical_url(url))
+                r["published_date"] = _published_date_for_tavily_result(r)
+                r["quality_score"] = score_source(url)
+                out.append(r)
+        return out
+
+    current = list(sources)
 
-If coverage is thin, missing_angle should name the concrete gap (e.g. "recent quantitative data", "clinical guidelines", "historical context")."""
+    if len(current) < 4:
+        try:
+            with stage("tavily_search", purpose="supplemental"):
+                resp = await atavily_call(
+                    "search",
+                    query=research_question,
+                    search_depth="advanced",
+                    max_results=5,
+                )
+            current = _merge_tavily_results(current, resp.get("results", []))
+        except Exception as e:
+            logger.error("Supplemental search (few sources) failed: %s", e)
 
     sufficient = True
     missing_angle = ""
-    try:
-        raw_eval = call_claude(eval_system, eval_user, max_tokens=80)
-        clean_eval = raw_eval.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
-        ev = json.loads(clean_eval)
-        if isinstance(ev, dict):
-            sufficient = bool(ev.get("sufficient", True))
-            missing_angle = (ev.get("missing_angle") or "").strip()
-    except Exception as e:
-        logger.warning("Source evaluation JSON failed, assuming sufficient: %s", e)
+    with stage("source_sufficiency") as span:
+        score, components, uncovered = _source_sufficiency(research_question, current)
+        high = _env_float("SOURCE_SUFFICIENCY_HIGH", 0.75)
+        low = _env_float("SOURCE_SUFFICIENCY_LOW", 0.40)
+        if score >= high:
+            decision = "sufficient"
+        elif score < low and (missing_angle := _local_missing_angle(components, uncovered)):
+            decision = "insufficient"
+            sufficient = False
+        else:
+            decision = "ambiguous"
+        span.attrs.update(score=round(score, 3), decision=decision)
+    logger.info(
+        "Source sufficiency %.2f (%s): %s",
+        score, decision, ", ".join(f"{k}={v:.2f}" for k, v in components.items()),
+    )
+    if decision == "ambiguous":
+        sufficient, missing_angle = await _llm_source_evaluation(research_question, current)
+    else:
+        SOURCE_EVAL_SKIPPED.labels(decision=decision).inc()
 
     logger.info(
         "Source evaluation: sufficient=%s missing_angle=%r",
@@ -500,27 +1859,29 @@ If coverage is thin, missing_angle should name the concrete gap (e.g. "recent qu
     if not sufficient and missing_angle:
         try:
             targeted_query = f"{research_question} {missing_angle}".strip()
-            resp2 = tavily_client.search(
-                query=targeted_query[:500],
-                search_depth="advanced",
-                max_results=5,
-            )
-            seen_urls = {s.get("url") for s in current if s.get("url")}
+            with stage("tavily_search", purpose="missing_angle"):
+                resp2 = await atavily_call(
+                    "search",
+                    query=targeted_query[:500],
+                    search_depth="advanced",
+                    max_results=5,
+                )
+            seen_urls = {canonical_url(s.get("url")) for s in current if s.get("url")}
             added = 0
             for r in resp2.get("results", []):
                 if added >= 3:
                     break
                 url = r.get("url", "")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
+                if url and canonical_url(url) not in seen_urls:
+                    seen_urls.add(canonical_url(url))
+                    r["published_date"] = _published_date_for_tavily_result(r)
                     r["quality_score"] = score_source(url)
                     current.append(r)
                     added += 1
         except Exception as e:
             logger.error("Targeted Tavily search for missing angle failed: %s", e)
 
-    current.sort(key=lambda x: x.get("quality_score", 0), reverse=True)
-    return current[:10]
+    return rerank_sources(research_question, collapse_duplicate_sources(current), limit=research_source_cap())
 
 
 # =============================================================================
@@ -566,13 +1927,164 @@ Return this JSON structure:
 }}"""
 
     try:
-        raw = call_claude(system, user, max_tokens=1000)
+        with stage("fact_extraction", sources=len(sources)):
+            raw = await acall_claude(system, user, site="extract_facts_from_sources")
         # Strip any accidental markdown fences
         clean = raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
         return json.loads(clean)
     except Exception as e:
-        logger.error("Fact extraction failed: %s", e)
-        return {"facts": []}
+        logger.error("Fact extraction failed, falling back to source excerpts: %s", e)
+        note_degraded("fact_extraction")
+        return {"facts": _excerpt_facts(sources)}
+
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
+def _excerpt_facts(sources: List[Dict], max_facts: int = 8) -> List[Dict]:
+    """Degraded fact list: the opening sentence of each source's snippet, attributed to it.
+
+    Each entry is flagged ``excerpt`` so analytics can tell it from an extracted fact.
+    """
+    facts = []
+    for i, s in enumerate(sources, 1):
+        content = " ".join((s.get("content") or "").split())
+        if not content:
+            continue
+        text = _SENTENCE_END_RE.split(content, maxsplit=1)[0][:280]
+        facts.append({"text": text, "source_index": i, "has_numbers": bool(re.search(r"\d", text)), "excerpt": True})
+        if len(facts) >= max_facts:
+            break
+    return facts
+
+
+# =============================================================================
+# STEP 2b — DEEP RESEARCH ROUNDS (deep mode: parallel gap branches until a budget or convergence)
+# =============================================================================
+_DEEP_GAPS_SYSTEM = """You plan follow-up web searches for a research report. Given the research question and the facts gathered so far, name the most important aspects that are still missing or thinly supported.
+
+Return ONLY a JSON array of at most {n} short web search queries, one per missing aspect, most important first. Return [] if the facts already cover the question well. No explanation."""
+
+# Sources a single branch may add, and the smallest number of new facts a round must bring.
+_DEEP_BRANCH_SOURCES = 4
+_DEEP_MIN_NEW_FACTS = 2
+
+
+def _trace_tokens() -> int:
+    trace = _current_trace.get()
+    return sum(s.input_tokens + s.output_tokens for s in trace.spans) if trace is not None else 0
+
+
+async def _deep_gap_queries(question: str, facts: List[Dict], n: int) -> List[str]:
+    facts_text = "\n".join(f"- {f.get('text', '')}" for f in facts[:40]) or "(none yet)"
+    user = f"Research question:\n{question}\n\nFacts gathered so far:\n{facts_text}"
+    with stage("deep_gaps"):
+        raw = await acall_claude(_DEEP_GAPS_SYSTEM.format(n=n), user, site="deep_research_gaps")
+    parsed = json.loads(raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip())
+    if not isinstance(parsed, list):
+        return []
+    return [q.strip()[:300] for q in parsed if isinstance(q, str) and q.strip()][:n]
+
+
+async def _deep_branch(question: str, query: str, seen_urls: set, sem: asyncio.Semaphore) -> Tuple[List[Dict], List[Dict]]:
+    """One gap branch: search, keep the best unseen sources, extract facts from them.
+    Fact ``source_index`` values are 1-based within the returned sources."""
+    profile = research_profile()
+    async with sem:
+        with stage("tavily_search", purpose="deep_branch"):
+            resp = await atavily_call(
+                "search", query=query, search_depth=profile["search_depth"], max_results=profile["results_per_query"],
+            )
+        found = []
+        for r in resp.get("results", []):
+            url = r.get("url", "")
+            if url and canonical_url(url) not in seen_urls:
+                r["published_date"] = _published_date_for_tavily_result(r)
+                r["quality_score"] = score_source(url)
+                found.append(r)
+        found = rerank_sources(query, collapse_duplicate_sources(found), limit=_DEEP_BRANCH_SOURCES)
+        # Only the kept sources are claimed (no await since the filter, so concurrent branches
+        # can't both keep one); dropped candidates stay available to later rounds and branches.
+        seen_urls.update(canonical_url(r["url"]) for r in found)
+        if not found:
+            return [], []
+        result = await extract_facts_from_sources(question, found)
+    return found, [f for f in result.get("facts", []) if isinstance(f, dict)]
+
+
+async def deep_research_rounds(question: str, sources: List[Dict], facts: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    """Extend ``sources``/``facts`` with rounds of parallel gap-search branches (deep mode).
+
+    Each round asks Claude for up to ``branches`` missing aspects and runs one branch per
+    aspect (at most DEEP_BRANCH_CONCURRENCY at a time). Sources that contribute new facts are
+    appended and those facts renumbered onto the merged source list, so the result feeds straight into
+    ``generate_report_from_facts``. Stops after ``rounds`` rounds, when the gap list comes back
+    empty, when a round adds fewer than ``_DEEP_MIN_NEW_FACTS`` facts, when DEEP_TOKEN_BUDGET is
+    spent, when less than DEEP_REPORT_RESERVE_S is left before the deadline, or at ``max_total_sources``.
+    """
+    profile = research_profile()
+    sources, facts = list(sources), list(facts)
+    seen_urls = {canonical_url(s.get("url")) for s in sources if s.get("url")}
+    seen_facts = {" ".join(str(f.get("text", "")).lower().split()) for f in facts}
+    sem = asyncio.Semaphore(_env_int("DEEP_BRANCH_CONCURRENCY", 3, 1))
+    token_budget = _env_int("DEEP_TOKEN_BUDGET", 60_000)
+    tokens_at_start = _trace_tokens()
+    reserve_s = _env_float("DEEP_REPORT_RESERVE_S", 120.0)
+    rounds = 0
+    stop = "max_rounds"
+    while rounds < profile["rounds"]:
+        if deadline_remaining() < reserve_s:
+            stop = "deadline"
+            break
+        if _trace_tokens() - tokens_at_start >= token_budget:
+            stop = "token_budget"
+            break
+        if len(sources) >= profile["max_total_sources"]:
+            stop = "source_cap"
+            break
+        try:
+            queries = await _deep_gap_queries(question, facts, profile["branches"])
+        except Exception as e:
+            logger.warning("Deep research gap planning failed, stopping rounds: %s", e)
+            stop = "gap_planning_failed"
+            break
+        if not queries:
+            stop = "converged"
+            break
+        rounds += 1
+        branches = await asyncio.gather(
+            *(_deep_branch(question, q, seen_urls, sem) for q in queries), return_exceptions=True,
+        )
+        added = 0
+        for query, branch in zip(queries, branches):
+            if isinstance(branch, BaseException):
+                logger.error("Deep research branch %r failed: %s", query, branch)
+                continue
+            branch_sources, branch_facts = branch
+            # Only sources that contribute a new fact join the merged list.
+            merged_index: Dict[int, int] = {}
+            for f in branch_facts:
+                key = " ".join(str(f.get("text", "")).lower().split())
+                idx = f.get("source_index")
+                if not key or key in seen_facts or not isinstance(idx, int) or not 1 <= idx <= len(branch_sources):
+                    continue
+                if idx not in merged_index:
+                    if len(sources) >= profile["max_total_sources"]:
+                        continue
+                    sources.append(branch_sources[idx - 1])
+                    merged_index[idx] = len(sources)
+                seen_facts.add(key)
+                facts.append({**f, "source_index": merged_index[idx]})
+                added += 1
+        logger.info("Deep research round %d: %d branches, %d new facts, %d sources", rounds, len(queries), added, len(sources))
+        if added < _DEEP_MIN_NEW_FACTS:
+            stop = "converged"
+            break
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attrs["deep_rounds"] = rounds
+        trace.attrs["deep_stop"] = stop
+    return sources, facts
 
 
 # =============================================================================
@@ -587,6 +2099,8 @@ async def generate_report_from_facts(
     """
     Generates academic report using ONLY the extracted facts.
     No hallucination possible because the model can only cite provided facts.
+    With parallel sections enabled the sections are written concurrently instead
+    (``generate_report_by_sections``).
     """
     facts_text = "\n".join([
         f"[{f['source_index']}] {f['text']}"
@@ -638,10 +2152,158 @@ For references use the metadata provided for each source:
     - Format: Organisation. (Year). Title. URL"""
 
     try:
-        return call_claude(system, user, max_tokens=3500)
+        if facts and _parallel_sections_enabled():
+            with stage("report", facts=len(facts), sections=len(_REPORT_SECTIONS)):
+                return await generate_report_by_sections(question, facts, sources, conversation_summary)
+        with stage("report", facts=len(facts)):
+            return await acall_claude(system, user, site="generate_report_from_facts")
     except Exception as e:
         logger.error("Report generation failed: %s", e)
-        return "An error occurred while generating the report. Please try again."
+        note_degraded("report")
+        if not facts:
+            return "An error occurred while generating the report. Please try again."
+        return _partial_report(facts, sources)
+
+
+def _partial_report(facts: List[Dict], sources: List[Dict]) -> str:
+    """Report built locally from the extracted facts when the report call fails or runs out of time."""
+    findings = "\n".join(f"- {f['text']} [{f['source_index']}]" for f in facts)
+    cited = sorted({f["source_index"] for f in facts if isinstance(f.get("source_index"), int)})
+    references = "\n".join(_reference_entry(i, sources[i - 1]) for i in cited if 0 < i <= len(sources))
+    return f"""## Partial Results
+
+The full report could not be generated in time. Below are the verified findings gathered from the sources so far; ask again for the complete analysis.
+
+## Key Findings
+
+{findings}
+
+## References
+
+{references}"""
+
+
+_REPORT_SECTION_SYSTEM = """You write one section of an academic research report that helps students write research essays. Other sections are written separately, so write ONLY the section you are asked for.
+
+STRICT RULES:
+- Use ONLY the facts provided in the VERIFIED FACTS section — never add outside knowledge
+- Every claim MUST cite a source using the [N] number given with the fact
+- If the facts are insufficient for the section, say "Insufficient source data for this section" — never fabricate
+- Write in formal academic language
+- Start with the section heading exactly as given; no references list, no other sections"""
+
+# (heading, what the section covers, keywords that pick its fact subset or None for all facts,
+#  share of the generate_report_section max_tokens from llm_route)
+_REPORT_SECTIONS: List[Tuple[str, str, Optional[str], float]] = [
+    ("Executive Summary", "4-5 bullet points of the key findings across all the facts", None, 0.45),
+    ("Introduction and Background", "context, definitions and why the question matters",
+     "background context history definition overview scope trend", 0.65),
+    ("Literature Review and Current Evidence", "what the evidence shows, grouped by theme, with figures where available",
+     "study studies evidence found data research results analysis increase reduction percent survey", 1.0),
+    ("Critical Analysis", "strengths and limitations of the evidence, conflicting findings and open questions",
+     "however limitation limited conflict debate uncertain risk compared although challenge cost bias", 0.8),
+    ("Conclusions", "a direct answer to the research question and its implications", None, 0.45),
+]
+# Facts per keyword-selected section; sections with fewer facts available get all of them.
+_SECTION_FACTS = 15
+
+
+def _parallel_sections_enabled() -> bool:
+    """REPORT_PARALLEL_SECTIONS=1/0 forces section-wise reports on/off; otherwise the mode decides."""
+    flag = (os.getenv("REPORT_PARALLEL_SECTIONS") or "").strip().lower()
+    if flag:
+        return flag in ("1", "true", "yes", "on")
+    return research_profile()["parallel_sections"]
+
+
+def _section_facts(question: str, facts: List[Dict], keywords: Optional[str]) -> List[Dict]:
+    """The facts most relevant to a section (BM25 over fact text), in their original order."""
+    if keywords is None or len(facts) <= _SECTION_FACTS:
+        return facts
+    scores = _BM25([_tokenize(f.get("text", "")) for f in facts]).scores(_tokenize(f"{question} {keywords}"))
+    top = sorted(range(len(facts)), key=lambda i: -scores[i])[:_SECTION_FACTS]
+    return [facts[i] for i in sorted(top)]
+
+
+def _reference_entry(index: int, source: Dict) -> str:
+    """``[N] Publisher. (Year). Title. URL`` from the source metadata (publisher = domain)."""
+    host = (urlparse(source.get("url") or "").hostname or "").removeprefix("www.")
+    m = _YEAR_RE.search(str(source.get("published_date") or ""))
+    year = m.group(1) if m else "n.d."
+    return f"[{index}] {host or 'Unknown'}. ({year}). {source.get('title') or 'Unknown'}. {source.get('url', '')}".strip()
+
+
+_CITATION_RE = re.compile(r"\[(\d+(?:\s*[,–-]\s*\d+)*)\]")
+
+
+def _cited_indices(text: str) -> List[int]:
+    """Source numbers cited as ``[N]``, ``[N, M]`` or ``[N-M]`` in ``text``, sorted."""
+    cited = set()
+    for group in _CITATION_RE.findall(text):
+        for part in re.split(r"\s*,\s*", group):
+            bounds = re.split(r"\s*[–-]\s*", part)
+            if len(bounds) == 2 and bounds[0].isdigit() and bounds[1].isdigit() and int(bounds[1]) - int(bounds[0]) < 50:
+                cited.update(range(int(bounds[0]), int(bounds[1]) + 1))
+            elif part.isdigit():
+                cited.add(int(part))
+    return sorted(cited)
+
+
+async def generate_report_by_sections(
+    question: str,
+    facts: List[Dict],
+    sources: List[Dict],
+    conversation_summary: Optional[str] = None,
+) -> str:
+    """Section-wise variant of ``generate_report_from_facts``: one concurrent Claude call per
+    section, each over the shared fact set or its section-specific subset.
+
+    Facts keep their global ``source_index``, so ``[N]`` means the same source in every
+    section; the References section is then built locally from the sources actually cited.
+    A failed section is replaced by a note (and the run marked degraded); if every section
+    fails the caller falls back like the single-call report.
+    """
+    summary_section = f"\nPrevious conversation context:\n{conversation_summary}\n" if conversation_summary else ""
+    # Largest section's budget for this mode (profile / LLM_ROUTES aware); the rest are shares of it.
+    _, section_max_tokens = llm_route("generate_report_section")
+
+    async def _section(number: int, heading: str, scope: str, keywords: Optional[str], share: float) -> str:
+        subset = _section_facts(question, facts, keywords)
+        facts_text = "\n".join(f"[{f['source_index']}] {f['text']}" for f in subset)
+        user = f"""Research question: {question}
+{summary_section}
+VERIFIED FACTS (use only these):
+{facts_text}
+
+Write section "## {number}. {heading}" of the report: {scope}.
+Cite every claim with the fact's [N]. If the facts are insufficient for this section, state that clearly."""
+        with stage("report_section", section=number):
+            return await acall_claude(
+                _REPORT_SECTION_SYSTEM, user, max_tokens=max(150, int(section_max_tokens * share)), site="generate_report_section"
+            )
+
+    results = await asyncio.gather(
+        *(_section(n, *spec) for n, spec in enumerate(_REPORT_SECTIONS, 1)), return_exceptions=True,
+    )
+    if all(isinstance(r, BaseException) for r in results):
+        raise RuntimeError(f"all report sections failed: {results[0]!r}")
+
+    parts = []
+    for n, ((heading, *_), result) in enumerate(zip(_REPORT_SECTIONS, results), 1):
+        if isinstance(result, BaseException):
+            logger.error("Report section %r failed: %s", heading, result)
+            note_degraded("report_section")
+            parts.append(f"## {n}. {heading}\n\n_This section could not be generated. Ask again for the complete analysis._")
+            continue
+        first, _, rest = result.strip().partition("\n")
+        if first.startswith("#") or heading.lower() in first.lower():
+            # Normalise whatever heading the model wrote to the report's numbering.
+            first = ""
+        parts.append(f"## {n}. {heading}\n\n" + "\n".join(filter(None, (first, rest.strip()))))
+
+    body = "\n\n".join(parts)
+    references = "\n".join(_reference_entry(i, sources[i - 1]) for i in _cited_indices(body) if 0 < i <= len(sources))
+    return f"{body}\n\n## {len(_REPORT_SECTIONS) + 1}. References\n\n{references or 'No sources were cited.'}"
 
 
 # =============================================================================
@@ -700,7 +2362,8 @@ If these facts contain enough real quantitative data for a meaningful chart, ret
 If insufficient real data exists for a chart, return: null"""
 
     try:
-        raw = call_claude(system, user, max_tokens=400)
+        with stage("chart"):
+            raw = await acall_claude(system, user, site="generate_chart_from_facts")
         clean = raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
         if clean.lower() == "null":
             return None
@@ -728,7 +2391,8 @@ Return 5 follow-up questions as a JSON array:
 ["question 1", "question 2", "question 3", "question 4", "question 5"]"""
 
     try:
-        raw = call_claude(system, user, max_tokens=200)
+        with stage("followups"):
+            raw = await acall_claude(system, user, site="generate_followups")
         clean = raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
         questions = json.loads(clean)
         if isinstance(questions, list):
@@ -746,17 +2410,66 @@ Return 5 follow-up questions as a JSON array:
 
 
 # =============================================================================
-# TITLE & SUMMARY HELPERS (lightweight — use Claude haiku equivalent)
+# TITLE & SUMMARY HELPERS (lightweight — fast model tier, see _LLM_SITE_ROUTES)
 # =============================================================================
 async def generate_title(prompt: str) -> str:
     """Generates a short title for a research conversation."""
     system = "Generate a short, concise title (4-6 words) for the following research question. Return only the title, nothing else."
     try:
-        return call_claude(system, prompt, max_tokens=15).strip().strip('"')
+        with stage("title"):
+            return (await acall_claude(system, prompt, site="generate_title")).strip().strip('"')
     except Exception:
         return "New Research"
 
 
+_PLAN_SYSTEM = """You plan a research run for a student's message. Return ONLY valid JSON with this exact shape:
+{"title": "4-6 word title", "queries": ["query1", "query2", "query3"], "is_brief": true or false, "questions": ["question 1", "question 2"]}
+
+- title: short, concise title for the research conversation, no quotes.
+- queries: exactly 3 web search queries. Query 1: core topic with academic signal. Query 2: recent evidence and data. Query 3: peer-reviewed research angle.
+- is_brief: true if the message is a pasted assignment brief or task instructions rather than a question.
+- questions: if is_brief, 2-3 specific, focused, answerable research questions that break the assignment down; otherwise [].
+
+No markdown, no explanation."""
+
+
+async def plan_research(prompt: str) -> Dict[str, Any]:
+    """One Claude call that replaces the title, sub-query and brief-question calls of a new run.
+
+    Returns ``{"title", "queries", "is_brief", "questions"}``. Every field is validated on its
+    own and is ``None`` when missing or malformed (all of them if the call fails), so callers
+    fall back to the dedicated helper for just that piece.
+    """
+    plan: Dict[str, Any] = {"title": None, "queries": None, "is_brief": None, "questions": None}
+    try:
+        with stage("research_plan"):
+            raw = await acall_claude(_PLAN_SYSTEM, f"Student message:\n{prompt[:4000]}", site="plan_research")
+        parsed = json.loads(raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip())
+    except Exception as e:
+        logger.warning("Research planning failed, falling back to separate calls: %s", e)
+        return plan
+    if not isinstance(parsed, dict):
+        logger.warning("Research plan is not a JSON object, falling back to separate calls")
+        return plan
+
+    title = parsed.get("title")
+    if isinstance(title, str) and title.strip().strip('"'):
+        plan["title"] = title.strip().strip('"')[:120]
+    queries = parsed.get("queries")
+    if isinstance(queries, list):
+        qs = [q.strip() for q in queries if isinstance(q, str) and q.strip()]
+        if len(qs) >= 3:
+            plan["queries"] = qs[:3]
+    if isinstance(parsed.get("is_brief"), bool):
+        plan["is_brief"] = parsed["is_brief"]
+    questions = parsed.get("questions")
+    if isinstance(questions, list):
+        qs = [q for q in questions if isinstance(q, str) and len(q.strip()) > 10][:3]
+        if qs:
+            plan["questions"] = qs
+    return plan
+
+
 async def extract_research_questions(assignment_text: str) -> List[str]:
     """Extract 2-3 focused research questions from an assignment brief."""
     system = """You are a research assistant helping students convert assignment briefs into focused research questions.
@@ -776,7 +2489,8 @@ Return ONLY a JSON array of strings, no explanation:
 Extract 2-3 focused research questions from this assignment."""
 
     try:
-        raw = call_claude(system, user, max_tokens=200)
+        with stage("research_questions"):
+            raw = await acall_claude(system, user, site="extract_research_questions")
         clean = raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
         questions = json.loads(clean)
         if isinstance(questions, list):
@@ -796,7 +2510,8 @@ async def summarize_conversation(history: List[Dict[str, str]]) -> str:
     history_str = "\n".join([f"{msg['role']}: {msg['content'][:500]}" for msg in history[-6:]])
     system = "Concisely summarize this conversation in 2-3 sentences. Focus on the key topics and conclusions. Return only the summary."
     try:
-        return call_claude(system, history_str, max_tokens=150)
+        with stage("conversation_summary"):
+            return await acall_claude(system, history_str, site="summarize_conversation")
     except Exception as e:
         logger.error("Conversation summarization failed: %s", e)
         return ""
@@ -805,54 +2520,152 @@ async def summarize_conversation(history: List[Dict[str, str]]) -> str:
 # =============================================================================
 # ARTICLE EXTRACTION
 # =============================================================================
-async def extract_article_content(url: str) -> Dict[str, Any]:
-    """Extracts article content from a URL using Tavily extract, with search fallback."""
+def _article_extraction_timeout() -> float:
+    """Shared wall-clock budget (seconds) for extracting both articles in ``/compare-articles``."""
+    return _env_float("ARTICLE_EXTRACTION_TIMEOUT_S", 45.0, minimum=1.0)
+
+
+def _failed_article_extraction(url: str) -> Dict[str, Any]:
+    return {"title": "", "content": "", "url": url, "extraction_failed": True, "extraction_length": 0}
+
+
+_ARTICLE_MAX_STORED_CHARS = 200_000
+
+
+class _ArticleContentCache:
+    """In-process LRU of extracted article text, keyed on URL.
+
+    Stores the full extracted text zlib-compressed. Entries expire after ``ttl_s`` and
+    the least recently used ones are evicted once compressed bytes exceed ``max_bytes``.
+    """
+
+    def __init__(self, ttl_s: float, max_bytes: int):
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, str, str, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(url: str) -> str:
+        return (url or "").strip()
+
+    def get(self, url: str) -> Optional[Dict[str, str]]:
+        key = self.key(url)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_at, title, final_url, blob = entry
+        if time.monotonic() - stored_at > self.ttl_s:
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return {"title": title, "url": final_url, "content": zlib.decompress(blob).decode("utf-8")}
+
+    def put(self, url: str, title: str, final_url: str, content: str) -> None:
+        if self.max_bytes <= 0 or self.ttl_s <= 0:
+            return
+        key = self.key(url)
+        blob = zlib.compress(content.encode("utf-8"), 6)
+        if len(blob) > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (time.monotonic(), title, final_url, blob)
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[3])
+
+
+_article_cache = _ArticleContentCache(
+    ttl_s=_env_float("ARTICLE_CACHE_TTL_S", 24 * 3600.0),
+    max_bytes=_env_int("ARTICLE_CACHE_MAX_BYTES", 32 * 1024 * 1024),
+)
+
+
+def _article_extraction_result(title: str, url: str, content: str, from_cache: bool = False) -> Dict[str, Any]:
+    # Full text is returned; generate_article_comparison_report selects what fits the prompt budget.
+    return {
+        "title": title,
+        "content": content,
+        "url": url,
+        "extraction_failed": len(content.strip()) < 200,
+        "extraction_length": len(content),
+        "from_cache": from_cache,
+    }
+
+
+async def extract_article_content(url: str, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """Extracts article content from a URL, serving repeat URLs from ``_article_cache``.
+
+    Successful extractions are cached with their full text; ``extraction_failed``
+    results are never cached so a later request can retry the URL.
+    """
+    cached = _article_cache.get(url)
+    record_cache_lookup("article_content", cached is not None)
+    if cached is not None:
+        logger.info("Article cache hit for %s (%d chars)", url, len(cached["content"]))
+        return _article_extraction_result(cached["title"], cached["url"], cached["content"], from_cache=True)
+
+    extracted = await _extract_article_uncached(url, deadline)
+    if extracted is None:
+        return _failed_article_extraction(url)
+    title, final_url, full_content = extracted
+    result = _article_extraction_result(title, final_url, full_content)
+    if result["extraction_failed"]:
+        logger.warning("Article extraction yielded minimal content for %s: %d chars", url, len(full_content))
+    else:
+        _article_cache.put(url, title, final_url, full_content)
+    return result
+
+
+async def _extract_article_uncached(url: str, deadline: Optional[float]) -> Optional[Tuple[str, str, str]]:
+    """Tavily extract with search fallback. Returns ``(title, final_url, full_text)`` or None.
+
+    Tavily calls run in worker threads so two extractions can proceed concurrently.
+    ``deadline`` (``time.monotonic()`` based) bounds extract + fallback together.
+    """
     if not tavily_client:
         logger.warning("Article extraction skipped for %s: Tavily not configured", url)
-        return {"title": "", "content": "", "url": url, "extraction_failed": True, "extraction_length": 0}
+        return None
     try:
-        response = tavily_client.extract(urls=[url])
+        response = await atavily_call("extract", deadline=deadline, urls=[url])
         if response and response.get("results"):
             result = response["results"][0]
-            content = result.get("raw_content", result.get("content", ""))[:6000]
-            title = result.get("title", "") or "Unknown Article"
-            extraction_failed = len(content.strip()) < 200
-            if extraction_failed:
-                logger.warning("Article extraction yielded minimal content for %s: %d chars", url, len(content))
-            return {
-                "title": title,
-                "content": content,
-                "url": url,
-                "extraction_failed": extraction_failed,
-                "extraction_length": len(content),
-            }
+            content = (result.get("raw_content") or result.get("content") or "")[:_ARTICLE_MAX_STORED_CHARS]
+            return result.get("title", "") or "Unknown Article", url, content
+    except asyncio.TimeoutError:
+        logger.warning("Article extraction timed out for %s", url)
+        return None
     except Exception:
         pass
 
     try:
-        response = tavily_client.search(
+        response = await atavily_call(
+            "search",
+            deadline=deadline,
             query=url,
             search_depth="advanced",
             max_results=1,
         )
         if response["results"]:
             result = response["results"][0]
-            content = result.get("content", "")[:6000]
-            title = result.get("title", "") or "Unknown Article"
-            extraction_failed = len(content.strip()) < 200
-            if extraction_failed:
-                logger.warning("Article extraction yielded minimal content for %s: %d chars", url, len(content))
-            return {
-                "title": title,
-                "content": content,
-                "url": result.get("url", url),
-                "extraction_failed": extraction_failed,
-                "extraction_length": len(content),
-            }
+            content = (result.get("content") or "")[:_ARTICLE_MAX_STORED_CHARS]
+            return result.get("title", "") or "Unknown Article", result.get("url", url), content
+    except asyncio.TimeoutError:
+        logger.warning("Article extraction fallback search timed out for %s", url)
     except Exception as e:
         logger.error("Article extraction failed for %s: %s", url, e)
 
-    return {"title": "", "content": "", "url": url, "extraction_failed": True, "extraction_length": 0}
+    return None
 
 
 # =============================================================================
@@ -1103,6 +2916,220 @@ async def _fetch_citation_metadata_for_url(client: httpx.AsyncClient, url: str)
     return result
 
 
+# =============================================================================
+# ARTICLE CHUNK SELECTION (fit both articles into one prompt budget)
+# =============================================================================
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset(
+    """a about above after again against all also am an and any are as at be because been before being
+    below between both but by can could did do does doing down during each few for from further had has
+    have having he her here hers herself him himself his how i if in into is it its itself just me more
+    most my myself no nor not now of off on once only or other our ours ourselves out over own same she
+    should so some such than that the their theirs them themselves then there these they this those
+    through to too under until up very was we were what when where which while who whom why will with
+    would you your yours yourself yourselves may might must shall one two however within without
+    article articles""".split()
+)
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and 1-char tokens removed (shared by local rankers)."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class _BM25:
+    """Okapi BM25 over a small in-memory corpus of token lists (or precomputed term-frequency Counters)."""
+
+    def __init__(self, docs: List[Any], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_freqs = [d if isinstance(d, Counter) else Counter(d) for d in docs]
+        self.doc_lens = [sum(f.values()) for f in self.doc_freqs]
+        self.avgdl = (sum(self.doc_lens) / len(docs)) if docs else 0.0
+        df: Counter = Counter()
+        for freqs in self.doc_freqs:
+            df.update(freqs.keys())
+        n = len(docs)
+        self.idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def scores(self, query_terms: List[str]) -> List[float]:
+        terms = [t for t in set(query_terms) if t in self.idf]
+        out = []
+        for freqs, dl in zip(self.doc_freqs, self.doc_lens):
+            norm = self.k1 * (1 - self.b + self.b * dl / self.avgdl) if self.avgdl else self.k1
+            s = 0.0
+            for t in terms:
+                tf = freqs.get(t)
+                if tf:
+                    s += self.idf[t] * tf * (self.k1 + 1) / (tf + norm)
+            out.append(s)
+        return out
+
+
+_CHUNK_TARGET_CHARS = 900
+_CHUNK_MAX_CHARS = 1600
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def _looks_like_heading(block: str) -> bool:
+    line = block.strip()
+    if not line or "\n" in line or len(line) > 100:
+        return False
+    return line.startswith("#") or not line.endswith((".", "!", "?", ",", ";", ":", '"', "”"))
+
+
+def _split_long_block(block: str, max_chars: int) -> List[str]:
+    pieces: List[str] = []
+    buf = ""
+    for sentence in _SENTENCE_SPLIT.split(block):
+        while len(sentence) > max_chars:
+            if buf:
+                pieces.append(buf)
+                buf = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if buf and len(buf) + len(sentence) + 1 > max_chars:
+            pieces.append(buf)
+            buf = sentence
+        else:
+            buf = f"{buf} {sentence}".strip()
+    if buf:
+        pieces.append(buf)
+    return pieces
+
+
+def _split_article_chunks(text: str) -> List[str]:
+    """Split article text into paragraph-sized chunks, keeping headings with the text that follows."""
+    blocks = [b.strip() for b in re.split(r"\n\s*\n", text or "") if b.strip()]
+    if len(blocks) <= 1 and len(text or "") > _CHUNK_MAX_CHARS:
+        blocks = [b.strip() for b in (text or "").split("\n") if b.strip()]
+
+    chunks: List[str] = []
+    buf = ""
+    buf_has_body = False
+    for block in blocks:
+        if _looks_like_heading(block):
+            # A heading closes the running chunk and opens the next one.
+            if buf_has_body:
+                chunks.append(buf)
+                buf, buf_has_body = "", False
+            buf = f"{buf}\n{block}".strip()
+            continue
+        for piece in ([block] if len(block) <= _CHUNK_MAX_CHARS else _split_long_block(block, _CHUNK_MAX_CHARS)):
+            if buf_has_body and len(buf) + len(piece) + 2 > _CHUNK_MAX_CHARS:
+                chunks.append(buf)
+                buf = ""
+            buf = f"{buf}\n\n{piece}".strip() if buf else piece
+            buf_has_body = True
+            if len(buf) >= _CHUNK_TARGET_CHARS:
+                chunks.append(buf)
+                buf, buf_has_body = "", False
+    if buf:
+        chunks.append(buf)
+    return chunks
+
+
+_COMPARISON_FOCUS_TERMS = {
+    "overall": "argue argument claim conclusion evidence findings suggest implications",
+    "methodology": "method methods methodology sample participants survey interview experiment design data dataset analysis procedure measured",
+    "findings": "findings results found show shows evidence outcome outcomes effect significant increase decrease conclusion",
+}
+_SECTION_CUE_TERMS = ("abstract", "summary", "introduction", "conclusion", "conclusions", "discussion", "findings", "results")
+
+
+def _approx_tokens(text: str) -> int:
+    return len(text or "") // 4
+
+
+def _comparison_article_budget_chars() -> int:
+    """Shared prompt budget for both article bodies (default 3000 tokens ≈ the old 2 × 6000 chars)."""
+    return _env_int("COMPARISON_ARTICLE_TOKEN_BUDGET", 3000, minimum=500) * 4
+
+
+def _rank_article_chunks(chunks: List[str], query_terms: List[str]) -> List[float]:
+    """Relevance per chunk: BM25 against the query (normalised to 0-1) plus small position/section priors."""
+    bm25 = _BM25([_tokenize(c) for c in chunks])
+    raw = bm25.scores(query_terms)
+    top = max(raw) if raw and max(raw) > 0 else 1.0
+    ranked = []
+    for i, (chunk, s) in enumerate(zip(chunks, raw)):
+        score = s / top
+        if i == 0:
+            score += 0.35
+        elif i == len(chunks) - 1:
+            score += 0.15
+        head = chunk[:120].lower()
+        if any(cue in head for cue in _SECTION_CUE_TERMS):
+            score += 0.2
+        ranked.append(score)
+    return ranked
+
+
+def select_comparison_excerpts(
+    article1_content: str,
+    article2_content: str,
+    focus: Optional[str] = None,
+    context: Optional[str] = None,
+    budget_chars: Optional[int] = None,
+) -> Tuple[str, str]:
+    """Pack the most relevant chunks of both articles into one shared character budget.
+
+    Short articles are sent whole; long ones are split into paragraphs/sections, scored
+    against the comparison focus, the student's context and the vocabulary both articles
+    share, and packed best-first. Each article is guaranteed ~30% of the budget (or its
+    full length if shorter); selected chunks keep their original order.
+    """
+    budget = budget_chars or _comparison_article_budget_chars()
+    texts = [article1_content or "", article2_content or ""]
+    if sum(len(t) for t in texts) <= budget:
+        return texts[0], texts[1]
+
+    chunks = [_split_article_chunks(t) for t in texts]
+    vocab = [Counter(_tokenize(t)) for t in texts]
+    shared = sorted(set(vocab[0]) & set(vocab[1]), key=lambda t: vocab[0][t] + vocab[1][t], reverse=True)[:25]
+    focus_terms = _COMPARISON_FOCUS_TERMS.get(focus or "overall", focus or "")
+    query_terms = _tokenize(f"{focus_terms} {context or ''}") + shared
+    scores = [_rank_article_chunks(c, query_terms) for c in chunks]
+
+    selected: List[set] = [set(), set()]
+    used = [0, 0]
+    for a in (0, 1):
+        floor = min(len(texts[a]), int(budget * 0.3))
+        for idx in sorted(range(len(chunks[a])), key=lambda j: scores[a][j], reverse=True):
+            if used[a] >= floor:
+                break
+            size = len(chunks[a][idx])
+            if used[0] + used[1] + size <= budget:
+                selected[a].add(idx)
+                used[a] += size
+
+    remaining = sorted(
+        ((scores[a][j], a, j) for a in (0, 1) for j in range(len(chunks[a])) if j not in selected[a]),
+        reverse=True,
+    )
+    for _, a, j in remaining:
+        size = len(chunks[a][j])
+        if used[0] + used[1] + size <= budget:
+            selected[a].add(j)
+            used[a] += size
+
+    out = []
+    for a in (0, 1):
+        parts: List[str] = []
+        prev = -1
+        for j in sorted(selected[a]):
+            if parts and j != prev + 1:
+                parts.append("[...]")
+            parts.append(chunks[a][j])
+            prev = j
+        out.append("\n\n".join(parts))
+    logger.info(
+        "Comparison chunk selection: article1 %d/%d chars, article2 %d/%d chars (budget %d)",
+        len(out[0]), len(texts[0]), len(out[1]), len(texts[1]), budget,
+    )
+    return out[0], out[1]
+
+
 # =============================================================================
 # ARTICLE COMPARISON REPORT
 # =============================================================================
@@ -1457,10 +3484,87 @@ Organize by argument type for easy student navigation:
 """
 
 
+COMPARISON_MODES = ("standard", "map_reduce")
+
+_QUOTE_RULES = """**QUOTE EXTRACTION RULES:**
+- NEVER include mid-word brackets like "m[essy" - either reconstruct the full word or use clear ellipsis
+- Use standard ellipsis for truncation: "As we begin [...] we may prefer" instead of "As we begin to converse more often with AI [...] we may prefer"
+- Ensure all quotes are complete sentences or clearly marked truncations
+- No extraction artifacts should appear in final quotes"""
+
+
+def _extraction_failed_report(article: Dict, n: int, content_length: int, min_content_length: int) -> str:
+    return f"""# Content Extraction Failed for Article {n}
+
+I couldn't extract enough content from **{article.get('title', f'Article {n}')}**.
+
+**What you can do:**
+1. Copy the full article text and paste it into the "Article {n} text" field
+2. Make sure the URL is publicly accessible (not behind a paywall)
+3. Try a different URL if available
+
+**Article {n} URL attempted:** {article.get('url', 'No URL provided')}
+**Content extracted:** {content_length} characters (need at least {min_content_length})
+"""
+
+
+def _comparison_prompt_suffix(focus: Optional[str], context: Optional[str]) -> str:
+    """Focus, assignment-context and Research Gaps instructions shared by both comparison modes."""
+    suffix = ""
+    # Append focus instruction if not the default
+    if focus and focus != "overall":
+        focus_instructions = {
+            "methodology": "Focus your thematic comparison on methodological differences and how they affect conclusions.",
+            "findings": "Focus your thematic comparison on findings/results and where they agree or conflict.",
+        }
+        suffix += f"\n**COMPARISON FOCUS:** {focus_instructions.get(focus, focus)}\n"
+
+    # Append assignment context if provided
+    if context:
+        suffix += f"""
+**STUDENT'S ASSIGNMENT CONTEXT:**
+{context}
+
+Tailor your thematic comparison to help with this specific assignment. Identify which article better supports different positions the student might take.
+"""
+
+    suffix += f"""
+Generate a comprehensive thematic comparison following the framework above.
+
+{RESEARCH_GAPS_INSTRUCTION}
+
+CRITICAL: The Research Gaps section must include 4-5 fully detailed gaps before you finish.
+Each gap must have What's missing, How to find it (with quoted search bullets), Recommended sources, and Why it matters.
+End the Research Gaps section with 'How to Use These Gaps' guidance.
+"""
+    return suffix
+
+
+async def _synthesize_comparison(user_prompt: str) -> str:
+    model, max_tokens = llm_route("generate_article_comparison_report")
+    message = await aclaude_create(
+        "generate_article_comparison_report",
+        model=model,
+        max_tokens=max_tokens,
+        temperature=0.3,
+        system=ARTICLE_COMPARISON_PROMPT,
+        messages=[{"role": "user", "content": user_prompt}],
+    )
+    return message.content[0].text
+
+
 async def generate_article_comparison_report(
-    article1: Dict, article2: Dict, focus: str = "overall", context: Optional[str] = None
+    article1: Dict,
+    article2: Dict,
+    focus: str = "overall",
+    context: Optional[str] = None,
+    mode: str = "standard",
 ) -> str:
-    """Generates a structured comparison report between two articles."""
+    """Generates a structured comparison report between two articles.
+
+    ``mode="map_reduce"`` compares full-length articles via per-section claim extraction
+    (see ``_map_article_sections``); the default sends selected excerpts in one call.
+    """
     if not claude_client:
         raise RuntimeError("Claude client not initialized. Check ANTHROPIC_API_KEY.")
 
@@ -1470,32 +3574,20 @@ async def generate_article_comparison_report(
     min_content_length = 200
 
     if len(article1_content) < min_content_length:
-        return f"""# Content Extraction Failed for Article 1
-
-I couldn't extract enough content from **{article1.get('title', 'Article 1')}**.
-
-**What you can do:**
-1. Copy the full article text and paste it into the "Article 1 text" field
-2. Make sure the URL is publicly accessible (not behind a paywall)
-3. Try a different URL if available
-
-**Article 1 URL attempted:** {article1.get('url', 'No URL provided')}
-**Content extracted:** {len(article1_content)} characters (need at least {min_content_length})
-"""
+        return _extraction_failed_report(article1, 1, len(article1_content), min_content_length)
 
     if len(article2_content) < min_content_length:
-        return f"""# Content Extraction Failed for Article 2
-
-I couldn't extract enough content from **{article2.get('title', 'Article 2')}**.
+        return _extraction_failed_report(article2, 2, len(article2_content), min_content_length)
 
-**What you can do:**
-1. Copy the full article text and paste it into the "Article 2 text" field
-2. Make sure the URL is publicly accessible (not behind a paywall)
-3. Try a different URL if available
+    if mode == "map_reduce":
+        try:
+            return await _map_reduce_comparison(article1, article2, article1_content, article2_content, focus, context)
+        except Exception as e:
+            logger.error("Map-reduce comparison failed, falling back to standard mode: %s", e)
 
-**Article 2 URL attempted:** {article2.get('url', 'No URL provided')}
-**Content extracted:** {len(article2_content)} characters (need at least {min_content_length})
-"""
+    article1_selected, article2_selected = select_comparison_excerpts(
+        article1_content, article2_content, focus, context
+    )
 
     # Build user message
     user_prompt = f"""Compare these two articles for a student literature review/essay.
@@ -1507,14 +3599,14 @@ If Article 1 appears to be less detailed than Article 2, that may reflect writin
 # ARTICLE 1: {article1.get('title', 'Article 1')}
 Source: {article1.get('url', 'Text provided by user')}
 
-{article1_content[:6000]}
+{article1_selected}
 
 ---
 
 # ARTICLE 2: {article2.get('title', 'Article 2')}
 Source: {article2.get('url', 'Text provided by user')}
 
-{article2_content[:6000]}
+{article2_selected}
 
 ---
 
@@ -1523,55 +3615,240 @@ For EACH theme, you must provide:
 2. What Article 2 says (with actual quotes from the text above)  
 3. How they compare
 
-**QUOTE EXTRACTION RULES:**
-- NEVER include mid-word brackets like "m[essy" - either reconstruct the full word or use clear ellipsis
-- Use standard ellipsis for truncation: "As we begin [...] we may prefer" instead of "As we begin to converse more often with AI [...] we may prefer"
-- Ensure all quotes are complete sentences or clearly marked truncations
-- No extraction artifacts should appear in final quotes
+{_QUOTE_RULES}
+
+Do NOT skip Article 1 content. Extract what it argues even if less technical than Article 2.
+
+"""
+    if article1_selected != article1_content or article2_selected != article2_content:
+        user_prompt += (
+            "Long articles were condensed to their most relevant passages; a line containing only [...] "
+            "marks skipped text. Do not mention the omissions in the report.\n\n"
+        )
+
+    user_prompt += _comparison_prompt_suffix(focus, context)
+
+    try:
+        return await _synthesize_comparison(user_prompt)
+    except Exception as e:
+        logger.error("Article comparison failed: %s", e)
+        return "An error occurred while generating the comparison report. Please try again."
+
+
+# --- Map-reduce comparison (long articles) ---
+_MAP_SECTION_CHARS = 6000
+_MAP_MAX_SECTIONS_PER_ARTICLE = 8
+
+_MAP_SECTION_SYSTEM = """You extract the substance of one section of an academic or news article so it can later be compared with another article.
+
+Return ONLY valid JSON with this exact shape:
+{"summary": "2-3 sentence summary of the section", "claims": [{"claim": "specific claim or argument", "evidence": "type and detail of supporting evidence, or empty string", "quote": "short verbatim quote from the section supporting the claim"}]}
+
+Rules:
+- Use ONLY what the section says; never add outside knowledge
+- At most 6 claims; prefer claims with concrete evidence, data, methods or conclusions
+- Quotes must be copied exactly from the section text
+No markdown, no preamble."""
+
+
+def _article_map_sections(content: str) -> List[str]:
+    """Group article chunks into map sections that together cover the whole article.
+
+    Sections are roughly ``_MAP_SECTION_CHARS``; a longer article gets proportionally larger
+    sections so it still fits in ``_MAP_MAX_SECTIONS_PER_ARTICLE`` map calls.
+    """
+    chunks = _split_article_chunks(content)
+    target = max(_MAP_SECTION_CHARS, -(-sum(len(c) for c in chunks) // _MAP_MAX_SECTIONS_PER_ARTICLE))
+    while True:
+        sections: List[str] = []
+        buf = ""
+        for chunk in chunks:
+            if buf and len(buf) + len(chunk) > target:
+                sections.append(buf)
+                buf = ""
+            buf = f"{buf}\n\n{chunk}".strip()
+        if buf:
+            sections.append(buf)
+        if len(sections) <= _MAP_MAX_SECTIONS_PER_ARTICLE:
+            return sections
+        # Chunk boundaries left a few sections over the cap; pack more per section.
+        target += target // 4
+
+
+async def _map_article_section(
+    sem: asyncio.Semaphore, title: str, index: int, total: int, section: str, focus: Optional[str], context: Optional[str]
+) -> Dict[str, Any]:
+    focus_line = f"Comparison focus: {focus}\n" if focus and focus != "overall" else ""
+    context_line = f"Student's assignment context: {context[:600]}\n" if context else ""
+    user = f"""Article: {title}
+Section {index} of {total}
+{focus_line}{context_line}
+SECTION TEXT:
+{section}"""
+    async with sem:
+        try:
+            raw = await acall_claude(_MAP_SECTION_SYSTEM, user, temperature=0.2, site="compare_map_section")
+            clean = raw.strip().lstrip("```json").lstrip("```").rstrip("```").strip()
+            parsed = json.loads(clean)
+            if isinstance(parsed, dict):
+                claims = [c for c in (parsed.get("claims") or []) if isinstance(c, dict) and c.get("claim")]
+                return {"section": index, "summary": str(parsed.get("summary") or ""), "claims": claims[:6]}
+        except Exception as e:
+            logger.warning("Map step failed for %r section %d: %s", title, index, e)
+    return {"section": index, "summary": "", "claims": []}
+
+
+def _format_article_claims(label: str, title: str, url: str, mapped: List[Dict[str, Any]]) -> str:
+    lines = [f"# {label}: {title}", f"Source: {url or 'Text provided by user'}", ""]
+    for m in mapped:
+        if not m["summary"] and not m["claims"]:
+            continue
+        lines.append(f"## Section {m['section']}")
+        if m["summary"]:
+            lines.append(f"Summary: {m['summary']}")
+        for c in m["claims"]:
+            line = f"- Claim: {c.get('claim')}"
+            if c.get("evidence"):
+                line += f" | Evidence: {c['evidence']}"
+            if c.get("quote"):
+                line += f' | Quote: "{c["quote"]}"'
+            lines.append(line)
+        lines.append("")
+    return "\n".join(lines)
+
+
+async def _map_reduce_comparison(
+    article1: Dict, article2: Dict, article1_content: str, article2_content: str, focus: Optional[str], context: Optional[str]
+) -> str:
+    """Map: extract claims per article section concurrently. Reduce: one synthesis call over the claim sets."""
+    sem = asyncio.Semaphore(_env_int("COMPARISON_MAP_CONCURRENCY", 6, minimum=1))
+    sections1 = _article_map_sections(article1_content)
+    sections2 = _article_map_sections(article2_content)
+    title1 = article1.get("title", "Article 1")
+    title2 = article2.get("title", "Article 2")
+    mapped = await asyncio.gather(
+        *(_map_article_section(sem, title1, i, len(sections1), s, focus, context) for i, s in enumerate(sections1, 1)),
+        *(_map_article_section(sem, title2, i, len(sections2), s, focus, context) for i, s in enumerate(sections2, 1)),
+    )
+    mapped1, mapped2 = list(mapped[: len(sections1)]), list(mapped[len(sections1):])
+    if not any(m["claims"] for m in mapped1) or not any(m["claims"] for m in mapped2):
+        raise RuntimeError("map step produced no claims for at least one article")
+    logger.info(
+        "Map-reduce comparison: %d + %d sections, %d + %d claims",
+        len(sections1), len(sections2),
+        sum(len(m["claims"]) for m in mapped1), sum(len(m["claims"]) for m in mapped2),
+    )
+
+    user_prompt = f"""Compare these two articles for a student literature review/essay.
 
-Do NOT skip Article 1 content. Extract what it argues even if less technical than Article 2.
+Both articles were read IN FULL, section by section. Below are the claims, evidence and verbatim quotes extracted from every section of each article. Treat them as complete coverage of each article and compare specific claims, arguments, and evidence from BOTH Article 1 and Article 2.
 
-"""
+{_format_article_claims("ARTICLE 1", title1, article1.get("url", ""), mapped1)}
+---
 
-    # Append focus instruction if not the default
-    if focus and focus != "overall":
-        focus_instructions = {
-            "methodology": "Focus your thematic comparison on methodological differences and how they affect conclusions.",
-            "findings": "Focus your thematic comparison on findings/results and where they agree or conflict.",
-        }
-        user_prompt += f"\n**COMPARISON FOCUS:** {focus_instructions.get(focus, focus)}\n"
+{_format_article_claims("ARTICLE 2", title2, article2.get("url", ""), mapped2)}
+---
 
-    # Append assignment context if provided
-    if context:
-        user_prompt += f"""
-**STUDENT'S ASSIGNMENT CONTEXT:**
-{context}
+For EACH theme, you must provide:
+1. What Article 1 says (using the quotes listed above)
+2. What Article 2 says (using the quotes listed above)
+3. How they compare
 
-Tailor your thematic comparison to help with this specific assignment. Identify which article better supports different positions the student might take.
+{_QUOTE_RULES}
+
+Only quote text that appears in the quotes above. Do NOT skip Article 1 content.
 """
+    user_prompt += _comparison_prompt_suffix(focus, context)
+    return await _synthesize_comparison(user_prompt)
 
-    user_prompt += f"""
-Generate a comprehensive thematic comparison following the framework above.
 
-{RESEARCH_GAPS_INSTRUCTION}
+# =============================================================================
+# COMPARISON REPORT INDEX (retrieval-scoped follow-up context)
+# =============================================================================
+_REPORT_HEADING = re.compile(r"^(#{1,4})\s+(.+?)\s*#*\s*$", re.M)
+_REPORT_SECTION_MAX_CHARS = 2500
 
-CRITICAL: The Research Gaps section must include 4-5 fully detailed gaps before you finish.
-Each gap must have What's missing, How to find it (with quoted search bullets), Recommended sources, and Why it matters.
-End the Research Gaps section with 'How to Use These Gaps' guidance.
-"""
 
-    try:
-        message = claude_client.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=7000,
-            temperature=0.3,
-            system=ARTICLE_COMPARISON_PROMPT,
-            messages=[{"role": "user", "content": user_prompt}],
-        )
-        return message.content[0].text
-    except Exception as e:
-        logger.error("Article comparison failed: %s", e)
-        return "An error occurred while generating the comparison report. Please try again."
+def build_report_index(report: str) -> Dict[str, Any]:
+    """Split a markdown report into heading-scoped sections with per-section term counts.
+
+    Sections are character offsets into the report (the text itself is not duplicated)
+    plus a ``tf`` map that ``retrieve_report_context`` BM25-ranks. Sections longer than ``_REPORT_SECTION_MAX_CHARS`` are split on
+    paragraph boundaries into numbered parts.
+    """
+    headings = list(_REPORT_HEADING.finditer(report or ""))
+    spans: List[Tuple[str, int, int]] = []
+    if not headings or headings[0].start() > 0:
+        end = headings[0].start() if headings else len(report or "")
+        if (report or "")[:end].strip():
+            spans.append(("Introduction", 0, end))
+
+    stack: List[Tuple[int, str]] = []
+    for i, m in enumerate(headings):
+        level = len(m.group(1))
+        title = m.group(2).strip().strip("*").strip()
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(report)
+        if report[m.end():end].strip():
+            spans.append((" > ".join(t for _, t in stack), m.start(), end))
+
+    sections: List[Dict[str, Any]] = []
+    for path, start, end in spans:
+        parts: List[Tuple[int, int]] = []
+        part_start = start
+        for para in re.finditer(r"\n\s*\n", report[start:end]):
+            cut = start + para.end()
+            if cut - part_start >= _REPORT_SECTION_MAX_CHARS:
+                parts.append((part_start, cut))
+                part_start = cut
+        if end > part_start:
+            parts.append((part_start, end))
+        for n, (s, e) in enumerate(parts, 1):
+            sections.append({
+                "title": path if len(parts) == 1 else f"{path} (part {n})",
+                "start": s,
+                "end": e,
+                "tf": dict(Counter(_tokenize(report[s:e]))),
+            })
+    return {"sections": sections}
+
+
+def retrieve_report_context(report: str, question: str, budget_chars: int) -> Tuple[str, List[str]]:
+    """Return ``(context, selected_titles)``: a short outline plus the top BM25 sections for ``question``.
+
+    Reports that fit in ``budget_chars`` are returned whole. The index is rebuilt from the
+    report on each call (local tokenizing only) rather than stored in the message metadata,
+    which the message endpoints send to the client.
+    """
+    if len(report) <= budget_chars:
+        return report, []
+    sections = build_report_index(report)["sections"]
+    if not sections:
+        return report[:budget_chars], []
+
+    outline = "\n".join(f"- {s['title']}" for s in sections)
+    bm25 = _BM25([Counter(s["tf"]) for s in sections])
+    scores = bm25.scores(_tokenize(question))
+    # The overview anchors most answers, so it gets a small boost even when no term matches.
+    for i, s in enumerate(sections):
+        if "overview" in s["title"].lower():
+            scores[i] += 0.5
+
+    remaining = budget_chars - len(outline)
+    chosen: List[int] = []
+    for i in sorted(range(len(sections)), key=lambda j: scores[j], reverse=True):
+        size = sections[i]["end"] - sections[i]["start"]
+        if scores[i] <= 0 and chosen:
+            break
+        if size <= remaining:
+            chosen.append(i)
+            remaining -= size
+    chosen.sort()
+    body = "\n\n".join(report[sections[i]["start"]:sections[i]["end"]].strip() for i in chosen)
+    context = f"Report outline (all sections):\n{outline}\n\nMost relevant sections:\n\n{body}"
+    return context, [sections[i]["title"] for i in chosen]
 
 
 # =============================================================================
@@ -1744,6 +4021,136 @@ def _insert_usage_event(user_id: Optional[str], event_type: str, metadata: Dict)
         logger.warning("usage_events insert skipped (%s): %s", event_type, e)
 
 
+# =============================================================================
+# RESPONSE CACHE (per-user read endpoints, invalidated by write endpoints)
+# =============================================================================
+def _strong_etag(payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison for If-None-Match (``*``, lists, ``W/`` prefixes)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class _UserResponseCache:
+    """Per-process cache of read-endpoint payloads, keyed by ``(user_id, route key)``.
+
+    Each entry remembers the user's read version it was loaded under (see
+    ``_read_version``). The version lives in Supabase, so a write handled by any
+    gunicorn worker invalidates every worker's entries; a lookup under a different
+    version is a miss. Entries also expire after ``ttl_s`` as a backstop for changes
+    that bypass ``_invalidate_user_reads`` (e.g. a role edited in the dashboard).
+    """
+
+    def __init__(self, ttl_s: float, max_entries: int):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[str, float, str, Any, Dict[str, str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, uid: str, key: str, version: str) -> Optional[Tuple[str, Any, Dict[str, str]]]:
+        entry = self._entries.get((uid, key))
+        if entry is None:
+            self.misses += 1
+            return None
+        stored_version, stored_at, etag, payload, headers = entry
+        if stored_version != version or time.monotonic() - stored_at > self.ttl_s:
+            del self._entries[(uid, key)]
+            self.misses += 1
+            return None
+        self._entries.move_to_end((uid, key))
+        self.hits += 1
+        return etag, payload, headers
+
+    def put(self, uid: str, key: str, version: str, payload: Any, headers: Dict[str, str]) -> str:
+        etag = _strong_etag({"v": version, "payload": payload, "headers": headers})
+        if self.max_entries > 0 and self.ttl_s > 0:
+            self._entries[(uid, key)] = (version, time.monotonic(), etag, payload, headers)
+            self._entries.move_to_end((uid, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def forget_user(self, uid: str) -> None:
+        for entry_key in [k for k in self._entries if k[0] == uid]:
+            del self._entries[entry_key]
+
+
+_response_cache = _UserResponseCache(
+    ttl_s=_env_float("RESPONSE_CACHE_TTL_S", 30.0),
+    max_entries=_env_int("RESPONSE_CACHE_MAX_ENTRIES", 5000),
+)
+# One row per user (backend/migrations/002_user_read_versions.sql); only the service-role client touches it.
+_READ_VERSIONS_TABLE = "user_read_versions"
+
+
+def _read_version(db: Any, uid: str) -> Optional[str]:
+    """The user's shared read version (primary-key lookup), or None if it can't be read.
+
+    A user with no row yet (never written since the table was added) is version ``"0"``.
+    """
+    try:
+        rows = db.table(_READ_VERSIONS_TABLE).select("version").eq("user_id", uid).limit(1).execute().data or []
+    except Exception as e:
+        logger.warning("Read version lookup failed for %s, serving uncached: %s", uid, e)
+        return None
+    return str(rows[0]["version"]) if rows else "0"
+
+
+def _invalidate_user_reads(uid: str) -> None:
+    """Call after any write that changes folders, conversations, messages or usage for ``uid``.
+
+    Stores a fresh random version for the user, which every worker's next read sees.
+    """
+    _response_cache.forget_user(uid)
+    if supabase is None:
+        return
+    try:
+        supabase.table(_READ_VERSIONS_TABLE).upsert({"user_id": uid, "version": os.urandom(12).hex()}, on_conflict="user_id").execute()
+    except Exception as e:
+        logger.warning("Read version bump failed for %s; other workers may serve it stale for up to %.0fs: %s",
+                       uid, _response_cache.ttl_s, e)
+
+
+async def _serve_cached_read(
+    db: Any,
+    uid: str,
+    key: str,
+    if_none_match: Optional[str],
+    load: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]],
+) -> Response:
+    """Serve a read endpoint from ``_response_cache`` (or 304) and fall back to ``load()``.
+
+    Only the user's read version is queried on a hit; ``load`` (which returns
+    ``(payload, extra_headers)``) runs on a miss and its payload is cached with a strong
+    ETag. If the version can't be read, ``load`` runs and nothing is cached.
+    """
+    version = _read_version(db, uid)
+    cached = _response_cache.get(uid, key, version) if version is not None else None
+    record_cache_lookup("response", cached is not None)
+    if cached is not None:
+        etag, payload, extra_headers = cached
+    else:
+        payload, extra_headers = await load()
+        if version is not None:
+            etag = _response_cache.put(uid, key, version, payload, extra_headers)
+        else:
+            etag = _strong_etag({"payload": payload, "headers": extra_headers})
+    headers = {**extra_headers, "ETag": etag, "Cache-Control": "private, max-age=0, must-revalidate"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=payload, headers=headers)
+
+
 # =============================================================================
 # API ENDPOINTS
 # =============================================================================
@@ -1855,14 +4262,30 @@ async def health_check():
         "supabase_reachable": supabase_reachable,
         "anthropic_key_set": bool(os.getenv("ANTHROPIC_API_KEY")),
         "tavily_key_set": bool(os.getenv("TAVILY_API_KEY")),
+        "llm_scheduler": llm_scheduler.snapshot(),
         "frontend_url": os.getenv("FRONTEND_URL") or "(not set)",
         "allowed_origins": _resolved_cors_allowed_origins(),
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(authorization: Annotated[Optional[str], Header()] = None):
+    """Prometheus exposition, aggregated across gunicorn workers when PROMETHEUS_MULTIPROC_DIR is set.
+
+    If ``METRICS_TOKEN`` is configured, scrapers must send it as a bearer token.
+    """
+    expected = (os.getenv("METRICS_TOKEN") or "").strip()
+    if expected and parse_bearer_token(authorization) != expected:
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=prom.generate_latest(_metrics_registry()), media_type=prom.CONTENT_TYPE_LATEST)
+
+
 # --- Folder Endpoints ---
 @app.get("/folders")
-async def get_folders(authorization: Annotated[Optional[str], Header()] = None):
+async def get_folders(
+    authorization: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
     try:
         user, token = await require_user_and_token(authorization)
         uid = _auth_uid(user)
@@ -1870,14 +4293,16 @@ async def get_folders(authorization: Annotated[Optional[str], Header()] = None):
         if not db:
             raise HTTPException(status_code=503, detail="Database client not configured.")
 
-        folders_response = db.table("folders").select("*").eq("user_id", uid).order("created_at", desc=False).execute()
+        async def load() -> Tuple[Any, Dict[str, str]]:
+            folders_response = db.table("folders").select("*").eq("user_id", uid).order("created_at", desc=False).execute()
 
-        folders_with_counts = []
-        for folder in folders_response.data or []:
-            count_response = db.table("conversations").select("id", count="exact").eq("user_id", uid).eq("folder_id", folder["id"]).execute()
-            folders_with_counts.append({**folder, "conversation_count": count_response.count or 0})
+            folders_with_counts = []
+            for folder in folders_response.data or []:
+                count_response = db.table("conversations").select("id", count="exact").eq("user_id", uid).eq("folder_id", folder["id"]).execute()
+                folders_with_counts.append({**folder, "conversation_count": count_response.count or 0})
+            return folders_with_counts, {}
 
-        return folders_with_counts
+        return await _serve_cached_read(db, uid, "folders", if_none_match, load)
     except HTTPException:
         raise
     except Exception as e:
@@ -1894,6 +4319,7 @@ async def create_folder(folder: FolderCreate, authorization: Annotated[Optional[
         if not db:
             raise HTTPException(status_code=503, detail="Database client not configured.")
         response = db.table("folders").insert({"user_id": uid, "name": folder.name, "color": folder.color}).execute()
+        _invalidate_user_reads(uid)
         return response.data[0]
     except HTTPException:
         raise
@@ -1922,6 +4348,7 @@ async def update_folder(folder_id: int, folder: FolderUpdate, authorization: Ann
             update_data["color"] = folder.color
 
         response = db.table("folders").update(update_data).eq("id", folder_id).execute()
+        _invalidate_user_reads(uid)
         return response.data[0]
     except HTTPException:
         raise
@@ -1957,6 +4384,7 @@ async def delete_folder(folder_id: int, delete_conversations: bool = False, auth
             message = f"Folder '{folder_name}' deleted. {len(conversation_ids)} research items moved to uncategorized."
 
         db.table("folders").delete().eq("id", folder_id).execute()
+        _invalidate_user_reads(uid)
         return {"message": message}
     except HTTPException:
         raise
@@ -1985,6 +4413,7 @@ async def reorder_folders(reorder_data: FolderReorder, authorization: Annotated[
             new_timestamp = base_time + timedelta(minutes=index)
             db.table("folders").update({"created_at": new_timestamp.isoformat()}).eq("id", folder_id).execute()
 
+        _invalidate_user_reads(uid)
         return {"message": "Folders reordered successfully"}
     except HTTPException:
         raise
@@ -2012,6 +4441,7 @@ async def move_conversation(move_data: ConversationMove, authorization: Annotate
                 raise HTTPException(status_code=404, detail="Folder not found or access denied")
 
         response = db.table("conversations").update({"folder_id": move_data.folder_id}).eq("id", move_data.conversation_id).execute()
+        _invalidate_user_reads(uid)
         return response.data[0]
     except HTTPException:
         raise
@@ -2020,20 +4450,115 @@ async def move_conversation(move_data: ConversationMove, authorization: Annotate
         raise HTTPException(status_code=500, detail="Failed to move conversation")
 
 
+# --- Keyset pagination helpers ---
+def _encode_cursor(created_at: Any, row_id: Any) -> str:
+    raw = json.dumps({"t": created_at, "id": row_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decode an opaque ``(created_at, id)`` keyset cursor; 400 on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        created_at, row_id = data["t"], data["id"]
+        if not isinstance(created_at, str) or isinstance(row_id, bool) or not isinstance(row_id, (int, str)):
+            raise ValueError("bad cursor fields")
+        return created_at, int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_before_filter(created_at: str, row_id: int) -> str:
+    """PostgREST ``or`` filter for rows strictly before ``(created_at, id)`` in descending order."""
+    ts = created_at.replace('"', "")
+    return f'created_at.lt."{ts}",and(created_at.eq."{ts}",id.lt.{row_id})'
+
+
+# Rows committed slightly out of timestamp order must not fall between two refreshes;
+# re-sending a few seconds of changes is harmless because clients merge by id.
+_CHANGES_OVERLAP_S = 5.0
+
+
+def _parse_changes_since(since: str) -> str:
+    """``since`` minus ``_CHANGES_OVERLAP_S`` as an ISO timestamp (UTC if no offset); 400 if unparseable."""
+    from datetime import datetime, timedelta, timezone
+
+    try:
+        ts = datetime.fromisoformat(since.strip().replace("Z", "+00:00"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be an ISO 8601 timestamp")
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return (ts - timedelta(seconds=_CHANGES_OVERLAP_S)).isoformat()
+
+
 @app.get("/conversations")
-async def get_conversations(folder_id: Optional[int] = None, authorization: Annotated[Optional[str], Header()] = None):
+async def get_conversations(
+    folder_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    authorization: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """The user's conversations, newest first.
+
+    ``limit`` pages the list; the next page's cursor is returned in ``X-Next-Cursor``.
+    ``since`` (the previous response's ``X-Changes-Until``, an ISO timestamp) turns the
+    call into an incremental refresh. It returns conversations created or changed after
+    that time (``updated_at``) plus ``{"id", "deleted": true, "updated_at"}`` entries for
+    deletions, and the new ``X-Changes-Until``. It cannot be combined with ``folder_id`` or
+    ``limit``. Served through ``_serve_cached_read`` (strong ETag, 304 on ``If-None-Match``).
+    """
     try:
         user, token = await require_user_and_token(authorization)
         uid = _auth_uid(user)
         db = _db_for_access_token(token)
         if not db:
             raise HTTPException(status_code=503, detail="Database client not configured.")
-
-        query = db.table("conversations").select("id, title, created_at, folder_id, conversation_type").eq("user_id", uid)
-        if folder_id is not None:
-            query = query.eq("folder_id", folder_id)
-        response = query.order("created_at", desc=True).execute()
-        return response.data or []
+        if limit is not None and not 1 <= limit <= 200:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+        if cursor and limit is None:
+            raise HTTPException(status_code=400, detail="cursor requires limit")
+        if since is not None:
+            if folder_id is not None or limit is not None:
+                raise HTTPException(status_code=400, detail="since cannot be combined with folder_id or limit")
+            since_after = _parse_changes_since(since)
+
+        async def load() -> Tuple[Any, Dict[str, str]]:
+            query = db.table("conversations").select("id, title, created_at, updated_at, folder_id, conversation_type").eq("user_id", uid)
+            if folder_id is not None:
+                query = query.eq("folder_id", folder_id)
+            if since is not None:
+                query = query.gt("updated_at", since_after)
+            if cursor:
+                query = query.or_(_keyset_before_filter(*_decode_cursor(cursor)))
+            query = query.order("created_at", desc=True).order("id", desc=True)
+            if limit is not None:
+                query = query.limit(limit + 1)
+            rows = query.execute().data or []
+
+            if since is not None:
+                deleted = (
+                    db.table("conversation_tombstones")
+                    .select("conversation_id, deleted_at")
+                    .eq("user_id", uid)
+                    .gt("deleted_at", since_after)
+                    .execute()
+                    .data
+                    or []
+                )
+                rows += [{"id": d["conversation_id"], "deleted": True, "updated_at": d["deleted_at"]} for d in deleted]
+                changed = [r["updated_at"] for r in rows if r.get("updated_at")]
+                return rows, {"X-Changes-Until": max(changed, default=since)}
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                return rows, {"X-Next-Cursor": _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])}
+            return rows, {}
+
+        key = f"conversations?folder_id={folder_id}&limit={limit}&cursor={cursor}&since={since}"
+        return await _serve_cached_read(db, uid, key, if_none_match, load)
     except HTTPException:
         raise
     except Exception as e:
@@ -2041,26 +4566,109 @@ async def get_conversations(folder_id: Optional[int] = None, authorization: Anno
         raise HTTPException(status_code=500, detail="Failed to retrieve conversations")
 
 
+# Metadata keys small enough to ship with ``fields=light`` listings; graph_data, followups and
+# comparison JSON stay behind GET /messages/{conversation_id}/{message_id}/metadata.
+_LIGHT_METADATA_KEYS = (
+    "report_type",
+    "comparison_type",
+    "message_type",
+    "assignment_guidance",
+    "article1_title",
+    "article2_title",
+    "comparison_focus",
+    "sources_used",
+)
+_MESSAGE_BASE_COLUMNS = "id, conversation_id, role, content, model_name, created_at"
+
+
+def _light_message_select() -> str:
+    return ", ".join([_MESSAGE_BASE_COLUMNS] + [f"meta_{k}:metadata->{k}" for k in _LIGHT_METADATA_KEYS])
+
+
+def _fold_light_metadata(row: Dict[str, Any]) -> Dict[str, Any]:
+    meta = {}
+    for k in _LIGHT_METADATA_KEYS:
+        val = row.pop(f"meta_{k}", None)
+        if val is not None:
+            meta[k] = val
+    row["metadata"] = meta
+    row["metadata_partial"] = True
+    return row
+
+
 @app.get("/messages/{conversation_id}")
-async def get_messages(conversation_id: int, authorization: Annotated[Optional[str], Header()] = None):
+async def get_messages(
+    conversation_id: int,
+    limit: Optional[int] = None,
+    before: Optional[str] = None,
+    fields: str = "full",
+    authorization: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
+    """Messages of a conversation, oldest first.
+
+    Without ``limit`` the whole thread is returned (legacy behaviour). With ``limit`` the
+    newest ``limit`` messages are returned and ``next_cursor`` pages towards older ones
+    (pass it back as ``before``). ``fields=light`` drops heavy metadata; fetch it per
+    message from ``/messages/{conversation_id}/{message_id}/metadata``.
+    """
     try:
         user, token = await require_user_and_token(authorization)
         uid = _auth_uid(user)
         db = _db_for_access_token(token)
         if not db:
             raise HTTPException(status_code=503, detail="Database client not configured.")
+        if fields not in ("full", "light"):
+            raise HTTPException(status_code=400, detail="fields must be 'full' or 'light'")
+        if limit is not None and not 1 <= limit <= 200:
+            raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+        if before and limit is None:
+            raise HTTPException(status_code=400, detail="before requires limit")
+
+        async def load() -> Tuple[Any, Dict[str, str]]:
+            convo_res = db.table("conversations").select("id, conversation_type").eq("id", conversation_id).eq("user_id", uid).execute()
+            if not convo_res.data:
+                raise HTTPException(status_code=404, detail="Conversation not found or access denied")
 
-        convo_res = db.table("conversations").select("id, conversation_type").eq("id", conversation_id).eq("user_id", uid).execute()
-        if not convo_res.data:
-            raise HTTPException(status_code=404, detail="Conversation not found or access denied")
+            conv_type = (convo_res.data[0] or {}).get("conversation_type") or "research_report"
 
-        conv_type = (convo_res.data[0] or {}).get("conversation_type") or "research_report"
+            columns = "*" if fields == "full" else _light_message_select()
+            query = db.table("messages").select(columns).eq("conversation_id", conversation_id)
+            next_cursor = None
+            if limit is None:
+                rows = query.order("created_at", desc=False).order("id", desc=False).execute().data or []
+            else:
+                if before:
+                    query = query.or_(_keyset_before_filter(*_decode_cursor(before)))
+                rows = (
+                    query.order("created_at", desc=True)
+                    .order("id", desc=True)
+                    .limit(limit + 1)
+                    .execute()
+                    .data
+                    or []
+                )
+                if len(rows) > limit:
+                    rows = rows[:limit]
+                    next_cursor = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+                rows.reverse()
 
-        messages_res = db.table("messages").select("*").eq("conversation_id", conversation_id).order("created_at", desc=False).execute()
-        return {
-            "messages": messages_res.data or [],
-            "conversation_type": conv_type,
-        }
+            if fields == "light":
+                rows = [_fold_light_metadata(r) for r in rows]
+            else:
+                for r in rows:
+                    # Comparisons saved before the index moved out of the metadata still carry it.
+                    if isinstance(r.get("metadata"), dict):
+                        r["metadata"].pop("report_index", None)
+            return {
+                "messages": rows,
+                "conversation_type": conv_type,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None,
+            }, {}
+
+        key = f"messages/{conversation_id}?limit={limit}&before={before}&fields={fields}"
+        return await _serve_cached_read(db, uid, key, if_none_match, load)
     except HTTPException:
         raise
     except Exception as e:
@@ -2068,6 +4676,42 @@ async def get_messages(conversation_id: int, authorization: Annotated[Optional[s
         raise HTTPException(status_code=500, detail="Failed to retrieve messages")
 
 
+@app.get("/messages/{conversation_id}/{message_id}/metadata")
+async def get_message_metadata(
+    conversation_id: int,
+    message_id: int,
+    authorization: Annotated[Optional[str], Header()] = None,
+):
+    """Full metadata for one message (the part ``fields=light`` listings omit)."""
+    try:
+        user, token = await require_user_and_token(authorization)
+        uid = _auth_uid(user)
+        db = _db_for_access_token(token)
+        if not db:
+            raise HTTPException(status_code=503, detail="Database client not configured.")
+
+        convo_res = db.table("conversations").select("id").eq("id", conversation_id).eq("user_id", uid).execute()
+        if not convo_res.data:
+            raise HTTPException(status_code=404, detail="Conversation not found or access denied")
+
+        msg_res = (
+            db.table("messages")
+            .select("id, metadata")
+            .eq("id", message_id)
+            .eq("conversation_id", conversation_id)
+            .limit(1)
+            .execute()
+        )
+        if not msg_res.data:
+            raise HTTPException(status_code=404, detail="Message not found")
+        return {"id": message_id, "metadata": msg_res.data[0].get("metadata") or {}}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error in get_message_metadata: %s", e)
+        raise HTTPException(status_code=500, detail="Failed to retrieve message metadata")
+
+
 @app.delete("/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: int, authorization: Annotated[Optional[str], Header()] = None):
     try:
@@ -2084,6 +4728,7 @@ async def delete_conversation(conversation_id: int, authorization: Annotated[Opt
         conversation_title = convo_check.data[0]["title"]
         db.table("messages").delete().eq("conversation_id", conversation_id).execute()
         db.table("conversations").delete().eq("id", conversation_id).execute()
+        _invalidate_user_reads(uid)
         return {"message": f"Research '{conversation_title}' deleted successfully"}
     except HTTPException:
         raise
@@ -2095,29 +4740,63 @@ async def delete_conversation(conversation_id: int, authorization: Annotated[Opt
 # =============================================================================
 # OPTIMIZED RESEARCH PIPELINE WITH PARALLEL PROCESSING
 # =============================================================================
+# Skip source refinement when less than this is left before the /research deadline.
+_RESEARCH_EVAL_MIN_BUDGET_S = 90.0
+
+
+async def _resolved(value: Any) -> Any:
+    """Awaitable that returns ``value``, for skipped slots in an ``asyncio.gather``."""
+    return value
+
+
 async def research_pipeline(
     query: str, 
-    conversation_summary: Optional[str] = None
-) -> Tuple[str, Optional[Dict], List[str], List[Dict]]:
+    conversation_summary: Optional[str] = None,
+    planned_queries: Optional[List[str]] = None,
+    reused: Optional[Tuple[List[Dict], List[Dict]]] = None,
+) -> Tuple[str, Optional[Dict], List[str], List[Dict], List[Dict]]:
     """
     Optimized research pipeline with parallel processing using asyncio.gather().
     
     Sequential flow optimization:
     1. multi_query_search (must run first)
-    2. PARALLEL: extract_facts_from_sources + generate_followups (both need search results)
+    2. PARALLEL: extract_facts_from_sources + generate_followups (both need search results),
+       then in deep mode deep_research_rounds
     3. PARALLEL: generate_report_from_facts + generate_chart_from_facts (both need facts)
+
+    The shape of each step (searches, source cap, refinement, chart, token limits) follows the
+    request's research mode (``research_profile()``).
+
+    Under the request deadline (``_request_deadline``) steps degrade instead of failing: source
+    refinement is skipped when time is short, facts fall back to source excerpts and the report to
+    a locally built partial report. Degraded steps are listed in the trace's ``degraded`` attr.
     
-    Returns: (report_content, chart_data, followup_suggestions, sources)
+    ``planned_queries`` are the search queries from ``plan_research`` for a new conversation.
+    ``reused`` is ``(sources, facts)`` from a recent near-duplicate run (see ``_ReportReuseCache``);
+    search and fact extraction are skipped and only the report, chart and followups are written.
+
+    Returns: (report_content, chart_data, followup_suggestions, sources, facts)
     """
     try:
         # Step 1: Search (must be first)
-        logger.info("Pipeline Step 1: Running multi-query search")
         search_query = query
         if conversation_summary:
             search_query = f"{query} (context: {conversation_summary[:200]})"
-        
-        sources = await multi_query_search(search_query)
-        sources = await evaluate_and_refine_sources(search_query, sources)
+
+        if reused is not None:
+            logger.info("Pipeline Step 1: Reusing %d sources and %d facts from a recent run", len(reused[0]), len(reused[1]))
+            sources = reused[0]
+        else:
+            logger.info("Pipeline Step 1: Running multi-query search")
+            sources = await multi_query_search(search_query, planned_queries)
+            if not research_profile()["refine"]:
+                sources = sources[:research_source_cap()]
+            elif deadline_remaining() > _RESEARCH_EVAL_MIN_BUDGET_S:
+                sources = await evaluate_and_refine_sources(search_query, sources)
+            else:
+                # Keep the remaining budget for facts + report rather than refining sources.
+                note_degraded("source_evaluation")
+                sources = sources[:research_source_cap()]
         
         if not sources:
             logger.warning("No search results returned for query: %s", query)
@@ -2132,14 +4811,15 @@ async def research_pipeline(
                     "Should I search for more recent or historical information?",
                     "What specific outcomes or findings are you looking for?"
                 ],
-                []
+                [],
+                [],
             )
         
         # Step 2: Extract facts and generate followups in parallel
         logger.info("Pipeline Step 2: Extracting facts and generating followups in parallel")
         try:
             facts_result, followup_suggestions = await asyncio.gather(
-                extract_facts_from_sources(query, sources),
+                _resolved({"facts": reused[1]}) if reused is not None else extract_facts_from_sources(query, sources),
                 generate_followups(query, f"Research on: {query}"),
                 return_exceptions=True
             )
@@ -2147,6 +4827,7 @@ async def research_pipeline(
             # Handle potential exceptions from parallel operations
             if isinstance(facts_result, Exception):
                 logger.error("Fact extraction failed: %s", facts_result)
+                note_degraded("fact_extraction")
                 facts_result = {"facts": []}
             
             if isinstance(followup_suggestions, Exception):
@@ -2164,6 +4845,7 @@ async def research_pipeline(
             
         except Exception as e:
             logger.error("Parallel step 2 failed: %s", e)
+            note_degraded("fact_extraction")
             facts = []
             followup_suggestions = [
                 "What are the main risks and mitigation strategies?",
@@ -2173,18 +4855,26 @@ async def research_pipeline(
                 "What are the policy implications and recommendations?",
             ]
         
+        if reused is None and research_profile()["rounds"]:
+            try:
+                sources, facts = await deep_research_rounds(query, sources, facts)
+            except Exception as e:
+                logger.error("Deep research rounds failed, reporting from the first round: %s", e)
+                note_degraded("deep_research")
+
         # Step 3: Generate report and chart in parallel
         logger.info("Pipeline Step 3: Generating report and chart in parallel")
         try:
             report_content, chart_data = await asyncio.gather(
                 generate_report_from_facts(query, facts, sources, conversation_summary),
-                generate_chart_from_facts(facts, sources),
+                generate_chart_from_facts(facts, sources) if research_profile()["chart"] else _resolved(None),
                 return_exceptions=True
             )
             
             # Handle potential exceptions from parallel operations
             if isinstance(report_content, Exception):
                 logger.error("Report generation failed: %s", report_content)
+                note_degraded("report")
                 report_content = "An error occurred while generating the report. Please try again."
             
             if isinstance(chart_data, Exception):
@@ -2198,10 +4888,11 @@ async def research_pipeline(
                 
         except Exception as e:
             logger.error("Parallel step 3 failed: %s", e)
+            note_degraded("report")
             report_content = "An error occurred while generating the report. Please try again."
             chart_data = None
         
-        return report_content, chart_data, followup_suggestions, sources
+        return report_content, chart_data, followup_suggestions, sources, facts
         
     except Exception as e:
         logger.error("Research pipeline failed: %s", e)
@@ -2216,15 +4907,285 @@ async def research_pipeline(
                 "Should I search for more recent or historical information?",
                 "What specific outcomes or findings are you looking for?"
             ],
-            []
+            [],
+            [],
+        )
+
+
+# =============================================================================
+# SINGLE-FLIGHT COALESCING (identical in-flight /research runs share one pipeline)
+# =============================================================================
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class _SingleFlight:
+    """Run at most one ``make_call()`` per key at a time in this process; concurrent callers share it.
+
+    The shared call runs as its own task, so a caller that goes away (client disconnect,
+    cancellation) does not cancel it for the others; it is cancelled only once no caller is
+    waiting any more. If the shared call fails or is cancelled, each follower makes one
+    attempt of its own (the first to retry becomes the new leader) instead of inheriting
+    the failure; the leader's own error propagates as usual.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Any, _Flight] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Any, make_call: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns ``(result, shared)``; ``shared`` is True when another caller's run was reused."""
+        retried = False
+        while True:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight(asyncio.ensure_future(make_call()))
+                self._flights[key] = flight
+                flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+            flight.waiters += 1
+            try:
+                return await asyncio.shield(flight.task), not leader
+            except asyncio.CancelledError:
+                # Our own cancellation propagates; the shared task being cancelled under us does not.
+                if leader or retried or not flight.task.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            except Exception as e:
+                if leader or retried:
+                    raise
+                logger.warning("Coalesced run failed for a follower (%r); retrying on its own", e)
+            finally:
+                flight.waiters -= 1
+                if flight.waiters == 0 and not flight.task.done():
+                    flight.task.cancel()
+            self._forget(key, flight)
+            retried = True
+
+    def _forget(self, key: Any, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+research_flights = _SingleFlight()
+_PROMPT_SPACE_RE = re.compile(r"\s+")
+
+
+def _research_flight_key(prompt: str, conversation_summary: Optional[str]) -> str:
+    """Research mode + normalized prompt + conversation context; equal keys get the same pipeline result."""
+    normalized = _PROMPT_SPACE_RE.sub(" ", (prompt or "").strip().lower()).rstrip(" ?.!")
+    context = _PROMPT_SPACE_RE.sub(" ", (conversation_summary or "").strip().lower())
+    return hashlib.sha256(f"{_research_mode.get()}\n{normalized}\n{context}".encode("utf-8")).hexdigest()
+
+
+class _UnsharedResult(Exception):
+    """Raised out of a shared research run whose result is a fallback (no sources or no facts).
+
+    Followers treat it like any failed shared run and retry on their own; only the caller
+    whose ``run()`` produced it (``owner``) returns the fallback.
+    """
+
+    def __init__(self, owner: object, result: Any, degraded: List[str]):
+        super().__init__("research pipeline returned a fallback result")
+        self.owner = owner
+        self.result = result
+        self.degraded = degraded
+
+
+def _coalescing_enabled() -> bool:
+    return (os.getenv("RESEARCH_COALESCE") or "1").strip().lower() in ("1", "true", "yes", "on")
+
+
+async def coalesced_research_pipeline(
+    query: str,
+    conversation_summary: Optional[str] = None,
+    planned_queries: Optional[List[str]] = None,
+    reused: Optional[Tuple[List[Dict], List[Dict]]] = None,
+) -> Tuple[Tuple[str, Optional[Dict], List[str], List[Dict], List[Dict]], bool]:
+    """``research_pipeline`` shared between identical concurrent runs (see ``_SingleFlight``).
+
+    Returns ``(pipeline_result, shared)``. The shared run records its spans on the leader's
+    trace; stages it degraded are copied onto every caller's trace. Fallback results
+    (``research_pipeline`` swallowed an error or found nothing) are never shared.
+    """
+    if not _coalescing_enabled():
+        return await research_pipeline(query, conversation_summary, planned_queries, reused), False
+
+    owner = object()
+
+    async def run() -> Tuple[Any, List[str]]:
+        result = await research_pipeline(query, conversation_summary, planned_queries, reused)
+        trace = _current_trace.get()
+        degraded = list(trace.attrs.get("degraded", [])) if trace is not None else []
+        if not result[3] or not result[4]:
+            raise _UnsharedResult(owner, result, degraded)
+        return result, degraded
+
+    try:
+        (result, degraded), shared = await research_flights.do(_research_flight_key(query, conversation_summary), run)
+    except _UnsharedResult as e:
+        if e.owner is not owner:
+            # A follower whose retry joined another caller's run, which also fell back.
+            return await research_pipeline(query, conversation_summary, planned_queries, reused), False
+        (result, degraded), shared = (e.result, e.degraded), False
+    for stage_name in degraded:
+        note_degraded(stage_name)
+    if shared:
+        # Zero-length span so the follower's trace shows the hit; the work is on the leader's trace.
+        with stage("research_coalesced"):
+            record_cache_hit()
+        RESEARCH_COALESCED.inc()
+        logger.info("Reused an in-flight research run for an identical prompt")
+    return result, shared
+
+
+# =============================================================================
+# REPORT REUSE (recent runs for near-duplicate prompts)
+# =============================================================================
+_REUSE_MIN_TOKENS = 3
+_REUSE_LSH_BANDS = 16
+# Stopwords that flip or order a research question ("X without Y", "X over Y", "more than").
+# _tokenize drops them, which would make opposite prompts look identical.
+_REUSE_KEPT_STOPWORDS = frozenset(
+    "above after against before below between during more most no nor not off only over than under until without".split()
+    + ["vs", "versus"]
+)
+
+
+def _reuse_tokens(prompt: str) -> List[str]:
+    """Prompt tokens for reuse matching: ``_tokenize`` minus its drop of negations and comparisons."""
+    tokens = []
+    for t in _TOKEN_RE.findall((prompt or "").lower()):
+        if len(t) < 2 or (t in _STOPWORDS and t not in _REUSE_KEPT_STOPWORDS):
+            continue
+        # Crude plural folding so "effect"/"effects" count as the same token.
+        tokens.append(t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t)
+    return tokens
+
+
+def _normalized_prompt(prompt: str) -> str:
+    """Lowercase word sequence of ``prompt`` with punctuation and spacing dropped (nothing else)."""
+    return " ".join(_TOKEN_RE.findall((prompt or "").lower()))
+
+
+class _ReportReuseCache:
+    """Recent new-conversation research results, looked up by lexical similarity of the prompt.
+
+    A prompt's fingerprint is the MinHash signature of its ``_reuse_tokens`` plus their
+    bigrams, so the similarity estimates Jaccard similarity over words and word order:
+    "A over B" and "B over A", or "X with Y" and "X without Y", stay far apart. Candidates
+    come from LSH buckets (``_REUSE_LSH_BANDS`` bands of the signature) and only those are
+    compared, so a lookup does not scan every entry. The full report is only reused for the
+    same normalized prompt; similar prompts reuse sources and facts. Only this process's runs
+    are kept; the oldest entries are evicted past ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, SimpleNamespace]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def signature(prompt: str) -> Tuple[int, ...]:
+        tokens = _reuse_tokens(prompt)
+        if len(tokens) < _REUSE_MIN_TOKENS:
+            return ()
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return minhash_signature(features, shingle_size=1)
+
+    @staticmethod
+    def _bands(sig: Tuple[int, ...]) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        rows = len(sig) // _REUSE_LSH_BANDS
+        for b in range(_REUSE_LSH_BANDS):
+            yield b, sig[b * rows:(b + 1) * rows]
+
+    def put(self, prompt: str, mode: str, title: str, result: Tuple[str, Optional[Dict], List[str], List[Dict], List[Dict]]) -> None:
+        sig = self.signature(prompt)
+        if not sig or self.max_entries <= 0:
+            return
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = SimpleNamespace(
+            stored_at=time.time(), signature=sig, normalized=_normalized_prompt(prompt), mode=mode, title=title, result=result
         )
+        for band in self._bands(sig):
+            self._buckets.setdefault(band, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for band in self._bands(entry.signature):
+            ids = self._buckets.get(band)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._buckets[band]
+
+    def lookup(self, prompt: str, mode: str) -> Optional[SimpleNamespace]:
+        """Best fresh match from a run in the same research ``mode`` as
+        ``SimpleNamespace(mode, similarity, age_s, entry)``, or None.
+
+        ``mode`` is ``"report"`` (reuse everything) only when the normalized prompt is
+        identical, and ``"facts"`` (reuse sources and facts, write a new report) at
+        REPORT_REUSE_THRESHOLD similarity. Entries older than REPORT_REUSE_MAX_AGE_S are
+        never returned; 0 turns reuse off.
+        """
+        max_age_s = _env_float("REPORT_REUSE_MAX_AGE_S", 6 * 3600.0)
+        sig = self.signature(prompt)
+        if not sig or max_age_s <= 0 or not self._entries:
+            return None
+        normalized = _normalized_prompt(prompt)
+        candidates = set()
+        for band in self._bands(sig):
+            candidates.update(self._buckets.get(band, ()))
+        now = time.time()
+        best: Optional[SimpleNamespace] = None
+        best_key = (False, 0.0, 0.0)
+        for entry_id in candidates:
+            entry = self._entries[entry_id]
+            if now - entry.stored_at > max_age_s:
+                self._drop(entry_id)
+                continue
+            if entry.mode != mode:
+                continue
+            key = (entry.normalized == normalized, minhash_similarity(sig, entry.signature), entry.stored_at)
+            if key > best_key:
+                best, best_key = entry, key
+        if best is None:
+            return None
+        exact, best_similarity, _ = best_key
+        if exact:
+            mode = "report"
+        elif best_similarity >= _env_float("REPORT_REUSE_THRESHOLD", 0.8):
+            mode = "facts"
+        else:
+            return None
+        return SimpleNamespace(mode=mode, similarity=best_similarity, age_s=now - best.stored_at, entry=best)
+
+
+report_reuse = _ReportReuseCache(max_entries=_env_int("REPORT_REUSE_MAX_ENTRIES", 500))
 
 
 # =============================================================================
 # MAIN RESEARCH ENDPOINT — OPTIMIZED WITH PARALLEL PROCESSING
 # =============================================================================
 @app.get("/usage")
-async def get_usage(authorization: Annotated[Optional[str], Header()] = None):
+async def get_usage(
+    authorization: Annotated[Optional[str], Header()] = None,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+):
     """Returns report quota usage (completed threads with an assistant reply). Non-admins can hit ``reports_quota_locked``."""
     try:
         user, token = await require_user_and_token(authorization)
@@ -2232,32 +5193,36 @@ async def get_usage(authorization: Annotated[Optional[str], Header()] = None):
         if not db:
             raise HTTPException(status_code=503, detail="Database client not configured.")
         uid = _auth_uid(user)
-        sources_cited_total = _total_sources_cited(uid, db)
-        if _user_is_admin(uid, db):
-            lifetime_reports = _lifetime_completed_report_threads(uid, db)
-            quota_locked_flag = _get_reports_quota_locked(uid, db)
+
+        async def load() -> Tuple[Any, Dict[str, str]]:
+            sources_cited_total = _total_sources_cited(uid, db)
+            if _user_is_admin(uid, db):
+                lifetime_reports = _lifetime_completed_report_threads(uid, db)
+                quota_locked_flag = _get_reports_quota_locked(uid, db)
+                return {
+                    "reports_used": lifetime_reports,
+                    "reports_limit": None,
+                    "reports_remaining": None,
+                    "is_admin": True,
+                    "reports_quota_locked": quota_locked_flag,
+                    "sources_cited_total": sources_cited_total,
+                }, {}
+            quota_locked, reports_used, _ = _evaluate_reports_quota(uid, db)
+            remaining = (
+                0
+                if quota_locked
+                else max(0, MONTHLY_REPORT_LIMIT - reports_used)
+            )
             return {
-                "reports_used": lifetime_reports,
-                "reports_limit": None,
-                "reports_remaining": None,
-                "is_admin": True,
-                "reports_quota_locked": quota_locked_flag,
+                "reports_used": reports_used,
+                "reports_limit": MONTHLY_REPORT_LIMIT,
+                "reports_remaining": remaining,
+                "is_admin": False,
+                "reports_quota_locked": quota_locked,
                 "sources_cited_total": sources_cited_total,
-            }
-        quota_locked, reports_used, _ = _evaluate_reports_quota(uid, db)
-        remaining = (
-            0
-            if quota_locked
-            else max(0, MONTHLY_REPORT_LIMIT - reports_used)
-        )
-        return {
-            "reports_used": reports_used,
-            "reports_limit": MONTHLY_REPORT_LIMIT,
-            "reports_remaining": remaining,
-            "is_admin": False,
-            "reports_quota_locked": quota_locked,
-            "sources_cited_total": sources_cited_total,
-        }
+            }, {}
+
+        return await _serve_cached_read(db, uid, "usage", if_none_match, load)
     except HTTPException:
         raise
     except Exception as e:
@@ -2298,9 +5263,23 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
     3. Report generation (facts only, no hallucination)
     4. Chart generation (real numbers only or None)
     + Follow-up question generation
+
+    Each stage is recorded as a span on a ``PipelineTrace`` that is summarized into the
+    ``research_completed`` usage event. ``mode`` picks the pipeline profile and the deadline
+    (``research_deadline_s``) that bounds every outbound call of the run; stages that run out of
+    time degrade to partial results.
     """
     start = time.time()
+    trace = PipelineTrace("research")
+    _current_trace.set(trace)
     try:
+        mode = (body.mode or "standard").strip().lower()
+        if mode not in RESEARCH_MODES:
+            raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(RESEARCH_MODES)}")
+        _research_mode.set(mode)
+        _request_deadline.set(time.monotonic() + research_deadline_s(mode))
+        trace.attrs["mode"] = mode
+
         user, token = await require_user_and_token(authorization)
         db = _db_for_access_token(token)
         if not db:
@@ -2335,9 +5314,27 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
         convo_id = body.conversation_id
         history = []
         conversation_summary = None
+        plan: Dict[str, Any] = {}
+        reuse: Optional[SimpleNamespace] = None
+
+        # Track assignment brief detection (500+ words likely indicates assignment paste)
+        word_count = len(body.prompt.split())
+        assignment_threshold = 500  # Configurable threshold for assignment detection
+
+        if not convo_id and word_count < assignment_threshold:
+            with stage("report_reuse"):
+                reuse = report_reuse.lookup(body.prompt, mode)
+                record_cache_lookup("report_reuse", reuse is not None)
 
         if not convo_id:
-            title = await generate_title(body.prompt)
+            # Title, search queries and brief questions come from one planning call.
+            if reuse is not None:
+                plan = {"title": reuse.entry.title}
+            elif _coalescing_enabled():
+                plan, _ = await research_flights.do(("plan", _research_flight_key(body.prompt, None)), lambda: plan_research(body.prompt))
+            else:
+                plan = await plan_research(body.prompt)
+            title = plan["title"] or await generate_title(body.prompt)
             conversation_data = {
                 "user_id": uid,
                 "title": title,
@@ -2345,7 +5342,8 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
             }
             if body.folder_id:
                 conversation_data["folder_id"] = body.folder_id
-            convo_res = db.table("conversations").insert(conversation_data).execute()
+            with stage("db_write", table="conversations"):
+                convo_res = db.table("conversations").insert(conversation_data).execute()
             convo_id = convo_res.data[0]["id"]
         else:
             convo_res = db.table("conversations").select("id").eq("id", convo_id).eq("user_id", uid).execute()
@@ -2359,13 +5357,12 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
         had_conversation_history = len(history) > 0
 
         # Save user message
-        db.table("messages").insert({
-            "conversation_id": convo_id, "role": "user", "content": body.prompt
-        }).execute()
+        with stage("db_write", table="messages"):
+            db.table("messages").insert({
+                "conversation_id": convo_id, "role": "user", "content": body.prompt
+            }).execute()
+        _invalidate_user_reads(uid)
 
-        # Track assignment brief detection (500+ words likely indicates assignment paste)
-        word_count = len(body.prompt.split())
-        assignment_threshold = 500  # Configurable threshold for assignment detection
         logger.info("Processing request with %d words (threshold: %d), force_process=%s", 
                    word_count, assignment_threshold, body.force_process)
         if word_count >= assignment_threshold and not body.force_process:
@@ -2375,7 +5372,8 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
                     "assignment_brief_detected",
                     {
                         "word_count": word_count,
-                        "endpoint": "research"
+                        "endpoint": "research",
+                        "planner_is_brief": plan.get("is_brief"),
                     }
                 )
                 
@@ -2384,7 +5382,7 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
                 
                 # Extract research questions with fallback
                 try:
-                    suggested_questions = await extract_research_questions(body.prompt)
+                    suggested_questions = plan.get("questions") or await extract_research_questions(body.prompt)
                 except Exception as e:
                     logger.error("Failed to extract research questions: %s", e)
                     suggested_questions = [
@@ -2438,6 +5436,7 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
                 
                 try:
                     message_res = db.table("messages").insert(message_to_save).execute()
+                    _invalidate_user_reads(uid)
                     logger.info("Successfully saved assignment brief guidance message")
                     return {
                         "conversation_id": convo_id,
@@ -2475,20 +5474,57 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
 
         # --- OPTIMIZED PIPELINE: Run research with parallel processing ---
         logger.info("Running optimized research pipeline for: %s", body.prompt)
-        report_content, chart_data, followup_suggestions, sources = await research_pipeline(
-            body.prompt, 
-            conversation_summary
-        )
+        coalesced = False
+        if reuse is not None:
+            REPORT_REUSED.labels(mode=reuse.mode).inc()
+            logger.info("Reusing a %.0f s old run (%s, similarity %.2f)", reuse.age_s, reuse.mode, reuse.similarity)
+        if reuse is not None and reuse.mode == "report":
+            report_content, chart_data, followup_suggestions, sources, facts = reuse.entry.result
+        else:
+            with RESEARCH_IN_FLIGHT.track_inprogress():
+                (report_content, chart_data, followup_suggestions, sources, facts), coalesced = await coalesced_research_pipeline(
+                    body.prompt,
+                    conversation_summary,
+                    plan.get("queries"),
+                    reuse.entry.result[3:5] if reuse is not None else None,
+                )
+            # Only complete runs are reusable (fallback reports and fact-less runs note a degraded stage),
+            # and only prompts short enough for lookup to ever consider them.
+            if (
+                body.conversation_id is None
+                and word_count < assignment_threshold
+                and reuse is None
+                and sources
+                and facts
+                and not trace.attrs.get("degraded")
+            ):
+                report_reuse.put(body.prompt, mode, title, (report_content, chart_data, followup_suggestions, sources, facts))
 
         # Build metadata
         metadata_json = {}
         if chart_data:
             metadata_json["graph_data"] = chart_data
         metadata_json["report_type"] = "research_report"
+        metadata_json["mode"] = mode
         metadata_json["followup_suggestions"] = followup_suggestions
         metadata_json["sources_used"] = len(sources)
-        # Note: facts count not available in optimized pipeline for performance
-        metadata_json["facts_extracted"] = len(sources)  # Use sources as proxy
+        excerpt_facts = sum(1 for f in facts if f.get("excerpt"))
+        metadata_json["facts_extracted"] = len(facts) - excerpt_facts
+        if excerpt_facts:
+            metadata_json["excerpt_facts"] = excerpt_facts
+        if "deep_rounds" in trace.attrs:
+            metadata_json["deep_rounds"] = trace.attrs["deep_rounds"]
+        if coalesced:
+            metadata_json["coalesced"] = True
+        if reuse is not None:
+            metadata_json["reuse"] = {
+                "mode": reuse.mode,
+                "similarity": round(reuse.similarity, 3),
+                "age_s": round(reuse.age_s),
+            }
+        if trace.attrs.get("degraded"):
+            metadata_json["partial"] = True
+            metadata_json["degraded_stages"] = list(trace.attrs["degraded"])
 
         # Save assistant message
         message_to_save = {
@@ -2498,9 +5534,12 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
             "content": report_content,
             "metadata": metadata_json,
         }
-        message_res = db.table("messages").insert(message_to_save).execute()
+        with stage("db_write", table="messages"):
+            message_res = db.table("messages").insert(message_to_save).execute()
 
-        locked, lifetime, just_reached = _evaluate_reports_quota(uid, db)
+        with stage("quota_check"):
+            locked, lifetime, just_reached = _evaluate_reports_quota(uid, db)
+        _invalidate_user_reads(uid)
 
         response_time_ms = (time.time() - start) * 1000
         _insert_usage_event(
@@ -2509,12 +5548,17 @@ async def run_research(request: Request, body: ResearchRequest, authorization: A
             {
                 "query_length": len(body.prompt),
                 "sources_found": len(sources),
-                "facts_extracted": len(sources),  # Use sources as proxy for optimized pipeline
+                "facts_extracted": len(facts) - excerpt_facts,
+                "excerpt_facts": excerpt_facts,
                 "chart_generated": bool(chart_data),
                 "has_conversation_history": had_conversation_history,
                 "response_time_ms": round(response_time_ms, 2),
                 "word_count": len((report_content or "").split()),
                 "optimized_pipeline": True,  # Flag to indicate this used the optimized pipeline
+                "mode": mode,
+                "coalesced": coalesced,
+                "reuse_mode": reuse.mode if reuse is not None else None,
+                "stage_timings": trace.summary(),
             },
         )
 
@@ -2618,19 +5662,26 @@ async def compare_articles(request: Request, body: ArticleComparisonRequest, aut
         if not ((body.article1_url or body.article1_text) and (body.article2_url or body.article2_text)):
             raise HTTPException(status_code=400, detail="Both articles must be provided (either URL or text)")
 
-        article1 = await extract_article_content(body.article1_url) if body.article1_url else {
-            "title": body.article1_title or "Article 1",
-            "content": body.article1_text or "",
-            "url": "",
-        }
-        article2 = await extract_article_content(body.article2_url) if body.article2_url else {
-            "title": body.article2_title or "Article 2",
-            "content": body.article2_text or "",
-            "url": "",
-        }
+        comparison_mode = (body.comparison_mode or "standard").strip().lower()
+        if comparison_mode not in COMPARISON_MODES:
+            raise HTTPException(status_code=400, detail=f"comparison_mode must be one of: {', '.join(COMPARISON_MODES)}")
+
+        # Both extractions (and their search fallbacks) share one deadline and run concurrently,
+        # so a two-URL comparison waits for the slower article rather than the sum of both.
+        extraction_deadline = time.monotonic() + _article_extraction_timeout()
+
+        async def _article_input(url: Optional[str], text: Optional[str], title: Optional[str], label: str) -> Dict[str, Any]:
+            if url:
+                return await extract_article_content(url, deadline=extraction_deadline)
+            return {"title": title or label, "content": text or "", "url": ""}
+
+        article1, article2 = await asyncio.gather(
+            _article_input(body.article1_url, body.article1_text, body.article1_title, "Article 1"),
+            _article_input(body.article2_url, body.article2_text, body.article2_title, "Article 2"),
+        )
 
         comparison_report = await generate_article_comparison_report(
-            article1, article2, body.comparison_focus or "overall", body.context
+            article1, article2, body.comparison_focus or "overall", body.context, mode=comparison_mode
         )
 
         title = f"Comparison: {article1.get('title', 'Article 1')[:40]} vs {article2.get('title', 'Article 2')[:40]}"
@@ -2644,6 +5695,7 @@ async def compare_articles(request: Request, body: ArticleComparisonRequest, aut
 
         convo_res = db.table("conversations").insert(conversation_data).execute()
         convo_id = convo_res.data[0]["id"]
+        _invalidate_user_reads(uid)
 
         user_message_content = f"Compare articles:\n\n**Article 1:** {article1.get('title', 'Article 1')}"
         if article1.get("url"):
@@ -2708,6 +5760,7 @@ async def compare_articles(request: Request, body: ArticleComparisonRequest, aut
         metadata_json["article1_title"] = article1.get("title", "Article 1")
         metadata_json["article2_title"] = article2.get("title", "Article 2")
         metadata_json["comparison_focus"] = body.comparison_focus or "overall"
+        metadata_json["comparison_mode"] = comparison_mode
         metadata_json["context"] = body.context
         metadata_json["sources_used"] = 2
 
@@ -2716,6 +5769,10 @@ async def compare_articles(request: Request, body: ArticleComparisonRequest, aut
 
         metadata_json["themes_identified"] = graph_data.get("themes_identified", [])
         metadata_json["key_conflicts"] = comparison_summary.get("conflicting_areas", [])
+        metadata_json["extracted_from_cache"] = {
+            "article1": bool(article1.get("from_cache")),
+            "article2": bool(article2.get("from_cache")),
+        }
         metadata_json["content_extracted_successfully"] = {
             "article1": len((article1.get("content") or "").strip()) > 200,
             "article2": len((article2.get("content") or "").strip()) > 200,
@@ -2729,6 +5786,7 @@ async def compare_articles(request: Request, body: ArticleComparisonRequest, aut
             "metadata": metadata_json,
         }
         message_res = db.table("messages").insert(message_to_save).execute()
+        _invalidate_user_reads(uid)
 
         return {
             "conversation_id": convo_id,
@@ -2807,6 +5865,11 @@ async def comparison_followup(
         article2_title = comp_metadata.get("article2_title") or "Article 2"
         comparison_content = comparison_msg.get("content") or ""
 
+        context_budget = _env_int("COMPARISON_FOLLOWUP_CONTEXT_TOKENS", 1800, minimum=300) * 4
+        comparison_context, context_sections = retrieve_report_context(
+            comparison_content, body.message, context_budget
+        )
+
         system_prompt = (
             "You help students reason about a previously generated article comparison. "
             "Use ONLY the comparison content provided; do not search for or invent new "
@@ -2818,79 +5881,27 @@ async def comparison_followup(
 **Article 1:** {article1_title}
 **Article 2:** {article2_title}
 
-**Full comparison analysis:**
-{comparison_content}
+**Comparison analysis (sections relevant to the question):**
+{comparison_context}
 
 ---
 
-**Student's follow-up question:** "{body.message}"
-
 **HOW TO RESPOND:**
-
-1. **Format**: Conversational, not a formal report
-   - Use bullet points and short bold headers when useful
-   - Keep it concise (2-4 paragraphs max for simple questions; 3-5 bullets is great for direct asks)
-   - Do NOT create numbered top-level sections like "1." or "Section 1"
-
-2. **Answer from the comparison data**:
-   - Reference specific themes or sections from the comparison
-   - Quote relevant passages from either article when helpful
-   - Be specific: "In the overlapping theme on X..." or "Article 1 says..."
-
-3. **If the comparison DOES cover this topic**:
-   - Answer directly and concisely
-   - Pull out the key points
-   - End with: "Want me to explain any of these points in more detail?"
-
-4. **If the comparison DOESN'T cover this topic well**:
-   - DO NOT just say "these sources won't help" or "they won't support your paper"
-   - DO say what they CAN contribute (even if limited)
-   - DO identify what's missing
-   - DO suggest how to fill the gap (search terms, types of sources to look for)
-   - End with: "Want help finding sources to fill this gap?"
-
-5. **Always end with a helpful offer**, e.g.:
-   - "Want me to elaborate on [X]?"
-   - "Should I unpack the [theme] in more detail?"
-   - "Would you like suggestions for additional sources on this?"
-
-**EXAMPLE - Good response to "What about privacy?"**:
-
-Neither article makes privacy its main focus, but here's what you can use:
-
-**What Article 1 Provides:**
-- Brief mention: "AI technologies enable surveillance and data collection"
-- Identifies privacy as a recognized concern category
-- BUT: No specific examples, no technical depth
-
-**What Article 2 Provides:**
-- Doesn't directly address surveillance
-- However, the discussion of algorithmic influence (recommendation systems tracking behavior) relates to data collection
-- The point about unregulated AI applies to privacy too
-
-**What's Missing:**
-You'd need sources specifically on:
-- Facial recognition and surveillance systems
-- Data privacy laws (GDPR, CCPA) vs. AI capabilities
-- Corporate data collection practices
-
-**How to Fill the Gap:**
-Search Google Scholar for: "AI surveillance privacy" or "facial recognition privacy concerns".
-Look for sources from: Electronic Frontier Foundation, AI Now Institute, or legal journals.
-
-Want help finding those sources, or should I explain how Article 1's brief privacy mention connects to your argument?
-
----
+- Conversational, not a formal report: short bold headers or bullets when useful, 2-4 short paragraphs or 3-5 bullets; no numbered top-level sections
+- Answer from the comparison: reference its themes and sections, quote either article when helpful ("Article 1 says...")
+- If the comparison covers the topic: answer directly, then offer to explain any point in more detail
+- If it doesn't cover the topic well: say what the articles CAN still contribute, name what's missing, and suggest how to fill the gap (Google Scholar search terms, kinds of sources or organisations); never just say the sources won't help
+- Always end with a short helpful offer (e.g. "Want help finding sources to fill this gap?")
 
 Now answer the student's question: "{body.message}"
 """
 
         try:
-            answer = call_claude(
+            answer = await acall_claude(
                 system_prompt,
                 user_prompt,
-                max_tokens=1500,
                 temperature=0.5,
+                site="comparison_followup",
             )
         except Exception as e:
             logger.error("Comparison follow-up Claude call failed: %s", e)
@@ -2914,9 +5925,12 @@ Now answer the student's question: "{body.message}"
                 "referenced_comparison": True,
                 "article1_title": article1_title,
                 "article2_title": article2_title,
+                "context_sections": context_sections,
+                "context_chars": len(comparison_context),
             },
         }
         message_res = db.table("messages").insert(assistant_msg).execute()
+        _invalidate_user_reads(uid)
 
         _insert_usage_event(
             uid,
@@ -0,0 +1,12 @@
+-- Per-user read version for the backend's response cache (_UserResponseCache in main.py).
+-- Write endpoints replace `version` with a random value; every gunicorn worker compares it
+-- with the version its cached /folders, /conversations, /messages and /usage payloads were
+-- loaded under before serving them. Run after 001_initial_schema.sql.
+
+create table if not exists public.user_read_versions (
+    user_id uuid primary key references auth.users (id) on delete cascade,
+    version text not null
+);
+
+-- Only the backend's service_role client (which bypasses RLS) reads or writes this table.
+alter table public.user_read_versions enable row level security;
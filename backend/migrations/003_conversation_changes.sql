@@ -0,0 +1,49 @@
+-- Change tracking for GET /conversations?since=... (incremental library refresh).
+-- conversations.updated_at moves on every update (rename, folder move, folder deletion);
+-- deleted conversations leave a tombstone so clients can drop them. Run after 002.
+
+alter table public.conversations
+    add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists conversations_user_updated_at_idx
+    on public.conversations (user_id, updated_at);
+
+create or replace function public.touch_updated_at() returns trigger
+language plpgsql as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists conversations_touch_updated_at on public.conversations;
+create trigger conversations_touch_updated_at
+    before update on public.conversations
+    for each row execute function public.touch_updated_at();
+
+create table if not exists public.conversation_tombstones (
+    conversation_id bigint primary key,
+    user_id uuid not null,
+    deleted_at timestamptz not null default now()
+);
+
+create index if not exists conversation_tombstones_user_deleted_at_idx
+    on public.conversation_tombstones (user_id, deleted_at);
+
+-- Only the backend's service_role client (which bypasses RLS) reads this table.
+alter table public.conversation_tombstones enable row level security;
+
+create or replace function public.record_conversation_tombstone() returns trigger
+language plpgsql security definer set search_path = public as $$
+begin
+    insert into public.conversation_tombstones (conversation_id, user_id)
+    values (old.id, old.user_id)
+    on conflict (conversation_id) do update set deleted_at = excluded.deleted_at;
+    return old;
+end;
+$$;
+
+drop trigger if exists conversations_record_tombstone on public.conversations;
+create trigger conversations_record_tombstone
+    after delete on public.conversations
+    for each row execute function public.record_conversation_tombstone();